@@ -0,0 +1,103 @@
+"""Bounded, structured conversation context for the agent loop.
+
+Instead of appending every tool result to an ever-growing query string, the
+loop records each step (the call and its result) and renders a prompt that
+stays within a character budget: the most recent steps are shown in full,
+older ones are compacted into one-line summaries, and the oldest summaries
+are dropped once even they no longer fit. If the recent steps alone are
+over budget they are compacted too, down to a summary of the latest step.
+"""
+from collections import deque
+
+# Rough conversion for callers that think in tokens
+CHARS_PER_TOKEN = 4
+
+DEFAULT_MAX_CHARS = 4000
+DEFAULT_KEEP_RECENT = 3
+MAX_CALL_CHARS = 500
+MAX_RESULT_CHARS = 1000
+SUMMARY_RESULT_CHARS = 80
+
+
+def _truncate(text, limit):
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+class AgentStep:
+    """One tool call made by the agent and the text of its result"""
+
+    def __init__(self, number, call, result):
+        self.number = number
+        self.call = call
+        self.result = result
+
+    def render(self):
+        return f"{self.number}. {_truncate(self.call, MAX_CALL_CHARS)} -> {_truncate(self.result, MAX_RESULT_CHARS)}"
+
+    def summary(self):
+        return f"{self.number}. {_truncate(self.call, SUMMARY_RESULT_CHARS)} -> {_truncate(self.result, SUMMARY_RESULT_CHARS)}"
+
+
+class AgentContext:
+    """The query plus a compacted history of tool calls, within max_chars
+
+    Compaction happens as steps are added, so render() only joins the
+    retained lines and the prompt size stays flat however long the task runs.
+    """
+
+    def __init__(self, query, max_chars=DEFAULT_MAX_CHARS, keep_recent=DEFAULT_KEEP_RECENT):
+        self.query = query
+        self.max_chars = max_chars
+        self.keep_recent = keep_recent
+        self.steps_taken = 0
+        self.omitted = 0
+        self._recent = deque()
+        self._summaries = deque()
+        self._size = 0
+
+    @property
+    def empty(self):
+        return not self.steps_taken
+
+    def add_step(self, call, result):
+        """Record a tool call and its result, compacting older steps as needed"""
+        self.steps_taken += 1
+        step = AgentStep(self.steps_taken, call, result)
+        line = step.render()
+        self._recent.append((step, line))
+        self._size += len(line) + 1
+
+        # Older steps keep only a one-line summary
+        while len(self._recent) > self.keep_recent:
+            self._compact_oldest()
+
+        # Over budget: drop the oldest summaries, then compact recent steps
+        # as well; the latest step always stays, at least as a summary
+        budget = self.max_chars - len(self.query) - 100
+        while self._size > budget:
+            if len(self._summaries) > (0 if self._recent else 1):
+                self._size -= len(self._summaries.popleft()) + 1
+                self.omitted += 1
+            elif self._recent:
+                self._compact_oldest()
+            else:
+                break
+
+    def _compact_oldest(self):
+        """Replace the oldest recent step by its summary"""
+        old_step, old_line = self._recent.popleft()
+        summary = old_step.summary()
+        self._summaries.append(summary)
+        self._size += len(summary) - len(old_line)
+
+    def render(self):
+        """Render the query and the retained history as the next prompt"""
+        if self.empty:
+            return self.query
+        lines = [self.query, "", "Previous steps:"]
+        if self.omitted:
+            lines.append(f"({self.omitted} earlier steps omitted)")
+        lines.extend(self._summaries)
+        lines.extend(line for _, line in self._recent)
+        lines.append("What should I do next?")
+        return "\n".join(lines)
@@ -0,0 +1,265 @@
+"""Record an agent run to JSONL and replay it without Gemini or a server.
+
+Recording wraps the LLM backend and the session pool. Every LLM response
+and tool result is appended to a JSONL file, one event per line:
+
+    {"type": "session", "session": "0", "query": "..."}
+    {"type": "tools", "tools": [...], "connect": 0.41, "list_tools": 0.01}
+    {"type": "llm", "session": "0", "prompt_sha256": "...", "text": "...", "seconds": 1.2}
+    {"type": "tool", "session": "0", "name": "add", "arguments": {...}, "result": {...}, "seconds": 0.003}
+
+An LLM or tool call that fails is recorded with "error" instead of "text"
+or "result": "timeout" if it timed out, otherwise the exception's message.
+Replay raises it again (TimeoutError or RuntimeError), so a run that lost
+an iteration to a failure loses it on replay too.
+
+Replaying reads the file back into a fake LLM and a fake server. Each
+conversation gets its own recorded LLM responses in order. Tool results are
+matched on (name, arguments) within the conversation, so calls that ran
+concurrently replay the same way whatever order they finish in. With
+speed=0 nothing sleeps and only the agent loop itself is timed; speed=1
+reproduces the recorded latencies.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+
+from mcp import types
+
+from llm_backends import LLMBackend, LLMResponse
+
+# Which conversation the current task belongs to; set by the agent per query
+current_session = contextvars.ContextVar('current_session', default=None)
+
+
+def _call_key(name, arguments):
+    return json.dumps([name, arguments or {}], sort_keys=True)
+
+
+def _error(exception):
+    """How a failed call is recorded"""
+    if isinstance(exception, asyncio.TimeoutError):
+        return 'timeout'
+    return str(exception) or type(exception).__name__
+
+
+def _raise_recorded(error):
+    if error == 'timeout':
+        raise asyncio.TimeoutError()
+    raise RuntimeError(error)
+
+
+class Recorder:
+    """Appends events to a JSONL file, flushed as they are written"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, event):
+        self._file.write(json.dumps(event) + '\n')
+        self._file.flush()
+
+    def session(self, session, query):
+        self.write({'type': 'session', 'session': session, 'query': query})
+
+    def close(self):
+        self._file.close()
+
+
+class RecordingBackend(LLMBackend):
+    """Passes prompts to another backend and records its responses"""
+
+    def __init__(self, inner, recorder):
+        super().__init__(inner.max_in_flight)
+        self.inner = inner
+        self.recorder = recorder
+
+    async def generate(self, prompt, timeout=10):
+        # Recorded around the timeout, so calls that time out are recorded too
+        event = {
+            'type': 'llm',
+            'session': current_session.get(),
+            'prompt_sha256': hashlib.sha256(prompt.encode('utf-8')).hexdigest(),
+        }
+        started = time.perf_counter()
+        try:
+            response = await super().generate(prompt, timeout)
+        except Exception as e:
+            event['error'] = _error(e)
+            raise
+        else:
+            event['text'] = response.text
+            return response
+        finally:
+            if 'text' in event or 'error' in event:
+                event['seconds'] = time.perf_counter() - started
+                self.recorder.write(event)
+
+    async def _generate(self, prompt):
+        return await self.inner._generate(prompt)
+
+
+class RecordingPool:
+    """Wraps an MCPSessionPool, recording its tool list and every call_tool result"""
+
+    def __init__(self, pool, recorder):
+        self.pool = pool
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+    def start_soon(self):
+        opening = self.pool.start_soon()
+        opening.add_done_callback(self._opened)
+        return opening
+
+    def _opened(self, opening):
+        if opening.cancelled() or opening.exception() is not None:
+            return
+        self.recorder.write({
+            'type': 'tools',
+            'tools': [tool.model_dump(mode='json', exclude_none=True) for tool in self.pool.tools],
+            **self.pool.timings,
+        })
+
+    async def call_tool(self, name, arguments=None, retries=1):
+        event = {'type': 'tool', 'session': current_session.get(), 'name': name, 'arguments': arguments}
+        started = time.perf_counter()
+        try:
+            result = await self.pool.call_tool(name, arguments=arguments, retries=retries)
+        except Exception as e:
+            event['error'] = _error(e)
+            raise
+        else:
+            event['result'] = result.model_dump(mode='json', exclude_none=True)
+            return result
+        finally:
+            if 'result' in event or 'error' in event:
+                event['seconds'] = time.perf_counter() - started
+                self.recorder.write(event)
+
+
+class Recording:
+    """The events of a recorded run, grouped by conversation"""
+
+    def __init__(self, events):
+        self.queries = {}
+        self.tools = []
+        self.timings = {}
+        self.llm = defaultdict(list)
+        self.calls = defaultdict(list)
+        for event in events:
+            kind = event['type']
+            if kind == 'session':
+                self.queries[event['session']] = event['query']
+            elif kind == 'tools':
+                self.tools = event['tools']
+                self.timings = {phase: event[phase] for phase in ('connect', 'list_tools') if phase in event}
+            elif kind == 'llm':
+                self.llm[event['session']].append(event)
+            elif kind == 'tool':
+                self.calls[event['session']].append(event)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.loads(line) for line in f if line.strip())
+
+    def replay(self, speed=0.0):
+        """A fresh (pool, llm) pair that plays the recording back once"""
+        return ReplayPool(self, speed), ReplayBackend(self, speed)
+
+
+async def _sleep(seconds, speed):
+    if speed and seconds:
+        await asyncio.sleep(seconds * speed)
+
+
+class ReplayBackend(LLMBackend):
+    """Fake LLM answering each conversation with its recorded responses"""
+
+    def __init__(self, recording, speed=0.0):
+        super().__init__(max_in_flight=max(len(recording.queries), 1))
+        self.speed = speed
+        self._responses = {session: deque(events) for session, events in recording.llm.items()}
+
+    async def _generate(self, prompt):
+        session = current_session.get()
+        responses = self._responses.get(session)
+        if not responses:
+            raise RuntimeError(f"Recording has no more LLM responses for session {session}")
+        event = responses.popleft()
+        await _sleep(event['seconds'], self.speed)
+        if 'error' in event:
+            _raise_recorded(event['error'])
+        return LLMResponse(event['text'])
+
+    @property
+    def remaining(self):
+        """Recorded responses not played back yet"""
+        return sum(len(responses) for responses in self._responses.values())
+
+
+class ReplayPool:
+    """Fake server with the MCPSessionPool interface, answering from a recording"""
+
+    def __init__(self, recording, speed=0.0):
+        self.speed = speed
+        self.reconnects = 0
+        self._recording = recording
+        self._results = {}
+        for session, events in recording.calls.items():
+            for event in events:
+                key = (session, _call_key(event['name'], event['arguments']))
+                self._results.setdefault(key, deque()).append(event)
+        self._tools = None
+        self._opening = None
+
+    def start_soon(self):
+        self._opening = asyncio.ensure_future(self._open())
+        return self._opening
+
+    async def _open(self):
+        await _sleep(self._recording.timings.get('connect', 0), self.speed)
+        await _sleep(self._recording.timings.get('list_tools', 0), self.speed)
+        self._tools = [types.Tool.model_validate(tool) for tool in self._recording.tools]
+
+    async def start(self):
+        await self.start_soon()
+
+    async def ready(self):
+        if self._opening is not None:
+            await self._opening
+
+    async def close(self):
+        if self._opening is not None:
+            await asyncio.gather(self._opening, return_exceptions=True)
+
+    @property
+    def tools(self):
+        return self._tools or []
+
+    @property
+    def timings(self):
+        return dict(self._recording.timings)
+
+    @property
+    def remaining(self):
+        """Recorded tool results not played back yet"""
+        return sum(len(results) for results in self._results.values())
+
+    async def call_tool(self, name, arguments=None, retries=1):
+        session = current_session.get()
+        results = self._results.get((session, _call_key(name, arguments)))
+        if not results:
+            raise RuntimeError(f"Recording has no result for {name}({arguments}) in session {session}")
+        event = results.popleft()
+        await _sleep(event['seconds'], self.speed)
+        if 'error' in event:
+            _raise_recorded(event['error'])
+        return types.CallToolResult.model_validate(event['result'])
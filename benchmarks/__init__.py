@@ -0,0 +1 @@
+"""Micro-benchmarks, run from the repository root with python -m benchmarks.<name>."""
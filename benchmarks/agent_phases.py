@@ -0,0 +1,164 @@
+"""Per-phase latency of the agent loop, from recorded sessions.
+
+    python -m benchmarks.agent_phases [RECORDING.jsonl ...] [--sessions 40] [--repeat 5]
+
+Recordings come from `talk2mcp.py --record PATH`. Without any, a synthetic
+recording is made first: a scripted LLM drives the real example2.py server
+with the mock Paint backend. Each recording is then replayed without
+waiting, so the replayed times are the agent loop's own overhead. The
+recorded times are what the live LLM and server took.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+from mcp import StdioServerParameters
+
+from agent_replay import Recorder, Recording, RecordingBackend, RecordingPool, current_session
+from llm_backends import FakeBackend
+from mcp_pool import MCPSessionPool
+from talk2mcp import PHASES, Conversation, build_system_prompt, percentile, run_queries
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROWS = ('connect', 'list_tools', 'system_prompt') + PHASES
+WORDS = ('INDIA', 'PARIS', 'MCP', 'Hello World', 'latency')
+
+
+def synthetic_queries(count, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            queries.append(f"Sum the exponentials of the ASCII values of {rng.choice(WORDS)}")
+        elif kind == 1:
+            queries.append(f"Add {rng.randint(1, 999)} and {rng.randint(1, 999)}, "
+                           f"then multiply by {rng.randint(2, 9)}")
+        else:
+            queries.append(f"Open Paint, draw a rectangle and write {rng.choice(WORDS)}")
+    return queries
+
+
+def scripted_response(prompt):
+    """What a well-behaved LLM would answer, so the recording exercises every phase"""
+    query = prompt.rpartition('\n\nQuery: ')[2].split('\n', 1)[0]
+    if 'Previous steps:' in prompt:
+        numbers = re.findall(r'-?\d+(?:\.\d+)?(?:e[+-]?\d+)?', prompt.rpartition('Previous steps:')[2])
+        return f"FINAL_ANSWER: [{numbers[-1] if numbers else 0}]"
+    if query.startswith('Sum'):
+        word = query.rpartition(' of ')[2]
+        return (f"FUNCTION_CALL: codes=strings_to_chars_to_int|{word}\n"
+                "FUNCTION_CALL: int_list_to_exponential_sum|$codes")
+    if query.startswith('Add'):
+        a, b, c = re.findall(r'\d+', query)
+        return f"FUNCTION_CALL: total=add|{a}|{b}\nFUNCTION_CALL: multiply|$total|{c}"
+    text = query.rpartition(' write ')[2]
+    return ("FUNCTION_CALL: paint=open_paint\n"
+            "FUNCTION_CALL: rect=draw_rectangle|100|100|400|400 @after paint\n"
+            f"FUNCTION_CALL: add_text_in_paint|{text} @after rect")
+
+
+async def record(path, sessions):
+    """Record a synthetic run against example2.py with the mock Paint backend"""
+    recorder = Recorder(path)
+    queries = synthetic_queries(sessions)
+    for i, query in enumerate(queries):
+        recorder.session(str(i), query)
+    params = StdioServerParameters(
+        command=sys.executable, args=['example2.py'], cwd=ROOT,
+        env={**os.environ, 'PAINT_BACKEND': 'mock', 'MCP_LOG_LEVEL': 'OFF'},
+    )
+    pool = RecordingPool(MCPSessionPool(params), recorder)
+    llm = RecordingBackend(FakeBackend(scripted_response, latency=0.05, jitter=0.05), recorder)
+    try:
+        await pool.start_soon()
+        catalog = SimpleNamespace(system_prompt=build_system_prompt(pool.tools))
+        await run_queries(pool, llm, catalog, queries, concurrency=8)
+    finally:
+        await pool.close()
+        recorder.close()
+
+
+def recorded_samples(recording):
+    samples = defaultdict(list)
+    for phase, seconds in recording.timings.items():
+        samples[phase].append(seconds)
+    for events in recording.llm.values():
+        samples['llm'] += [event['seconds'] for event in events]
+    for events in recording.calls.values():
+        samples['tool_call'] += [event['seconds'] for event in events]
+    return samples
+
+
+async def replay(recording, samples):
+    """Replay every conversation of recording once, adding the phase times to samples"""
+    pool, llm = recording.replay()
+    await pool.start()
+    started = time.perf_counter()
+    system_prompt = build_system_prompt(pool.tools)
+    samples['system_prompt'].append(time.perf_counter() - started)
+
+    async def converse(session, query):
+        current_session.set(session)
+        conversation = Conversation(pool, llm, system_prompt, query)
+        await conversation.run()
+        return conversation
+
+    conversations = await asyncio.gather(
+        *(converse(session, query) for session, query in recording.queries.items())
+    )
+    for conversation in conversations:
+        for phase, seconds in conversation.timings.items():
+            samples[phase] += seconds
+    await pool.close()
+    # Everything recorded was asked for again: the replay followed the same path
+    assert llm.remaining == 0 and pool.remaining == 0, (llm.remaining, pool.remaining)
+
+
+def _cell(samples):
+    if not samples:
+        return f"{'-':>27}"
+    samples = sorted(samples)
+    return (f"{len(samples):>5} {percentile(samples, 0.50) * 1000:>9.3f}"
+            f" {percentile(samples, 0.95) * 1000:>9.3f}")
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('recordings', nargs='*', help="JSONL files from talk2mcp.py --record")
+    parser.add_argument('--sessions', type=int, default=40, help="conversations in the synthetic recording")
+    parser.add_argument('--repeat', type=int, default=5, help="replays of each recording")
+    args = parser.parse_args(argv)
+
+    paths = args.recordings
+    if not paths:
+        path = os.path.join(tempfile.mkdtemp(), 'synthetic.jsonl')
+        print(f"Recording {args.sessions} synthetic sessions to {path}")
+        await record(path, args.sessions)
+        paths = [path]
+
+    recorded, replayed = defaultdict(list), defaultdict(list)
+    sessions = 0
+    for path in paths:
+        recording = Recording.load(path)
+        sessions += len(recording.queries)
+        for phase, seconds in recorded_samples(recording).items():
+            recorded[phase] += seconds
+        for _ in range(args.repeat):
+            await replay(recording, replayed)
+
+    print(f"\n{sessions} recorded sessions, each replayed {args.repeat} times (times in ms)")
+    print(f"{'phase':<14} {'recorded n':>10} {'p50':>9} {'p95':>9}   {'replayed n':>10} {'p50':>9} {'p95':>9}")
+    for phase in ROWS:
+        print(f"{phase:<14} {_cell(recorded[phase]):>30}   {_cell(replayed[phase]):>30}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
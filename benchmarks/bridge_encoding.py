@@ -0,0 +1,143 @@
+"""CPU per request of the HTTP bridge for each body encoding and compression.
+
+    python -m benchmarks.bridge_encoding [--requests 300] [--url http://localhost:8080]
+
+Starts mcp_server.py, unless --url points at a running bridge, and sends
+the same workloads as JSON, MessagePack and UTF-8 frames, each uncompressed
+and with every compression this environment supports. One keep-alive
+connection sends the requests back to back. Server CPU is the difference
+in the bridge's process CPU time (GET /metrics) over the run, and client
+CPU is this process's time to encode, send, receive, decompress and decode.
+Reversing the texts is cheap next to decoding and encoding them, so the
+times are mostly the bridge and its codecs.
+"""
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from benchmarks.bridge_load import fetch_process, read_response, spawn_bridge, stop_bridge
+from bridge_codecs import (
+    FRAMES_TYPE, JSON_TYPE, MSGPACK_TYPE, available_encodings, available_types, decode,
+    encode, zstandard,
+)
+
+DEFAULT_URL = 'http://localhost:8080'
+MIXED = 'Reverse "this" please:\n naïve café 漢字 かな emoji 🙂 tabs\t and\\slashes'.split(' ')
+ASCII = 'the quick brown fox jumps over a lazy dog 0123 456789 and, then.'.split(' ')
+
+
+def make_texts(words, count, length, seed=0):
+    """count texts of length characters made of random words, so they compress like prose"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        text = ''
+        while len(text) < length:
+            text += rng.choice(words) + ' '
+        texts.append(text[:length])
+    return texts
+
+
+# name, path, texts
+WORKLOADS = [
+    ('single 2K mixed', '/', make_texts(MIXED, 1, 2048)),
+    ('batch 200x200 mixed', '/batch', make_texts(MIXED, 200, 200)),
+    ('batch 200x200 ascii', '/batch', make_texts(ASCII, 200, 200)),
+]
+
+
+def request_body(path, texts, media_type):
+    if media_type == FRAMES_TYPE:
+        return encode(texts, media_type)
+    return encode({'text': texts[0]} if path == '/' else texts, media_type)
+
+
+def response_texts(body, media_type):
+    data = decode(body, media_type)
+    if media_type == FRAMES_TYPE:
+        return data
+    return [data['reversed']] if isinstance(data['reversed'], str) else data['reversed']
+
+
+def decompressor(encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(47)  # 47: gzip or zlib wrapper
+
+
+async def measure(url, path, texts, media_type, encoding, requests):
+    """(server CPU s, client CPU s, wall s, request bytes, response bytes) per request"""
+    parts = urlsplit(url)
+    host, port = parts.hostname or 'localhost', parts.port or 80
+    reader, writer = await asyncio.open_connection(host, port)
+    expected = ''.join(text[::-1] for text in (texts if path != '/' else [''.join(texts)]))
+    head = (
+        f'POST {path} HTTP/1.1\r\nHost: {host}:{port}\r\n'
+        f'Content-Type: {media_type}\r\nAccept: {media_type}\r\n'
+        f'Accept-Encoding: {encoding or "identity"}\r\n'
+    )
+    sent = received = 0
+    server_before = (await fetch_process(host, port)).get('cpu_seconds')
+    cpu_before, started = time.process_time(), time.perf_counter()
+    try:
+        for _ in range(requests):
+            body = request_body(path, texts, media_type)
+            writer.write(f'{head}Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+            await writer.drain()
+            status, headers, response = await read_response(reader)
+            received += len(response)
+            if headers.get('content-encoding'):
+                stream = decompressor(headers['content-encoding'])
+                response = stream.decompress(response) + stream.flush()
+            if status != 200:
+                raise RuntimeError(f'{path} answered {status}: {response[:200]!r}')
+            result = response_texts(response, headers['content-type'])
+            sent += len(body)
+        wall = time.perf_counter() - started
+        client = time.process_time() - cpu_before
+    finally:
+        writer.close()
+    server_after = (await fetch_process(host, port)).get('cpu_seconds')
+    if ''.join(result) != expected:
+        raise RuntimeError(f'{path} returned the wrong texts as {media_type}')
+    server = server_after - server_before if server_before is not None else float('nan')
+    return server / requests, client / requests, wall / requests, sent / requests, received / requests
+
+
+async def run(url, requests):
+    media_types = [t for t in (JSON_TYPE, MSGPACK_TYPE, FRAMES_TYPE) if t in available_types()]
+    print(f"{requests} requests per row over one keep-alive connection; CPU and wall time in µs per request")
+    print(f"{'workload':<22}{'encoding':<28}{'compression':<13}"
+          f"{'server':>9}{'client':>9}{'wall':>9}{'req B':>9}{'resp B':>9}")
+    for name, path, texts in WORKLOADS:
+        for media_type in media_types:
+            for encoding in (None,) + available_encodings():
+                # Warm up the connection and the server first
+                await measure(url, path, texts, media_type, encoding, 5)
+                server, client, wall, sent, received = await measure(
+                    url, path, texts, media_type, encoding, requests)
+                print(f"{name:<22}{media_type:<28}{encoding or '-':<13}"
+                      f"{server * 1e6:>9.1f}{client * 1e6:>9.1f}{wall * 1e6:>9.1f}"
+                      f"{sent:>9.0f}{received:>9.0f}")
+        print()
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=300, help="requests per row")
+    parser.add_argument('--url', help="a running bridge to measure instead of starting mcp_server.py")
+    args = parser.parse_args(argv)
+
+    process = None if args.url else await spawn_bridge(DEFAULT_URL)
+    try:
+        await run(args.url or DEFAULT_URL, args.requests)
+    finally:
+        if process is not None:
+            stop_bridge(process)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,363 @@
+"""Load generator for the mcp_server.py HTTP bridge.
+
+    python -m benchmarks.bridge_load [--url http://localhost:8080/] [--concurrency 16]
+                                     [--requests 2000 | --duration 10] [--sizes 64:70,1024:25,16384:5]
+                                     [--no-keep-alive] [--spawn]
+
+Each of --concurrency clients sends POST requests back to back over its own
+connection, reused while keep-alive is on and opened per request with
+--no-keep-alive. Payload sizes are drawn from --sizes, a list of
+text length:weight pairs, and every text is unique. The body follows the path: {"text": ...} for / and
+/tools/<name>, a JSON array of texts for /batch, raw UTF-8 for /stream.
+
+Reported are throughput, latency percentiles, the error rate (non-2xx
+answers and failed connections) and the server's RSS before, at peak and
+after the run, sampled from GET /metrics. --spawn starts mcp_server.py
+first and stops it afterwards; otherwise the bridge must already be running.
+The client is plain asyncio, so it needs nothing beyond the standard library.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = '64:70,1024:25,16384:5'
+BATCH_TEXT_CHARS = 64
+RSS_INTERVAL = 0.25
+STARTUP_TIMEOUT = 30.0
+
+
+def parse_sizes(spec):
+    """'64:70,1024:25' -> ([64, 1024], [70, 25]); a missing weight counts as 1"""
+    sizes, weights = [], []
+    for item in spec.split(','):
+        size, _, weight = item.strip().partition(':')
+        sizes.append(int(size))
+        weights.append(float(weight or 1))
+    if not sizes or min(sizes) < 0 or min(weights) < 0 or not sum(weights):
+        raise argparse.ArgumentTypeError(f"invalid size distribution: {spec!r}")
+    return sizes, weights
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, round(fraction * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+class Payloads:
+    """Request bodies for a bridge path, with sizes drawn from a distribution"""
+
+    def __init__(self, path, sizes, weights, seed=0):
+        self.path = path
+        self.sizes = sizes
+        self.weights = weights
+        self.rng = random.Random(seed)
+        # One random text slices into every size; a counter prefix keeps them unique
+        alphabet = string.ascii_letters + string.digits + ' '
+        self.text = ''.join(self.rng.choices(alphabet, k=max(sizes) + 1))
+        self.count = 0
+
+    def next(self):
+        """The next (content type, body) to send"""
+        self.count += 1
+        size = self.rng.choices(self.sizes, self.weights)[0]
+        prefix = f'{self.count}:'
+        text = (prefix + self.text[:max(0, size - len(prefix))])[:size]
+        if self.path == '/stream':
+            return 'text/plain; charset=utf-8', text.encode('utf-8')
+        if self.path == '/batch':
+            texts = [text[i:i + BATCH_TEXT_CHARS] for i in range(0, len(text), BATCH_TEXT_CHARS)]
+            return 'application/json', json.dumps(texts).encode('utf-8')
+        return 'application/json', json.dumps({'text': text}).encode('utf-8')
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, headers, body)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+            if not size:
+                await reader.readuntil(b'\r\n')
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(chunks)
+    elif 'content-length' in headers:
+        body = await reader.readexactly(int(headers['content-length']))
+    else:
+        body = await reader.read()  # Framed by the server closing the connection
+    return status, headers, body
+
+
+class LoadResult:
+    """Latencies and outcomes of every request of a run"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.failures = Counter()
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.elapsed = 0.0
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def errors(self):
+        return self.requests - sum(count for status, count in self.statuses.items() if status < 300)
+
+
+class Client:
+    """One connection's worth of back-to-back requests"""
+
+    def __init__(self, host, port, path, keep_alive, result):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.keep_alive = keep_alive
+        self.result = result
+        self.connection = None
+
+    async def close(self):
+        if self.connection is not None:
+            writer = self.connection[1]
+            self.connection = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, content_type, body):
+        head = (
+            f'POST {self.path} HTTP/1.1\r\n'
+            f'Host: {self.host}:{self.port}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if self.keep_alive else "close"}\r\n\r\n'
+        ).encode('latin-1')
+        result = self.result
+        started = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = await asyncio.open_connection(self.host, self.port)
+            reader, writer = self.connection
+            writer.write(head + body)
+            await writer.drain()
+            status, headers, response = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            result.latencies.append(time.perf_counter() - started)
+            result.failures[type(e).__name__] += 1
+            await self.close()
+            return
+        result.latencies.append(time.perf_counter() - started)
+        result.statuses[status] += 1
+        result.bytes_out += len(head) + len(body)
+        result.bytes_in += len(response)
+        if not self.keep_alive or headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+
+async def fetch_rss(host, port):
+    """The bridge process's RSS from GET /metrics, or None if unavailable"""
+    return (await fetch_process(host, port)).get('rss_bytes')
+
+
+async def fetch_process(host, port):
+    """The process section of the bridge's GET /metrics, or {} if unavailable"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return {}
+    try:
+        writer.write(f'GET /metrics HTTP/1.1\r\nHost: {host}:{port}\r\n'
+                     'Connection: close\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        status, _, body = await read_response(reader)
+        if status != 200:
+            return {}
+        return json.loads(body).get('process', {})
+    except (OSError, asyncio.IncompleteReadError, ValueError, AttributeError):
+        return {}
+    finally:
+        writer.close()
+
+
+async def sample_rss(host, port, samples, stop):
+    while not stop.is_set():
+        rss = await fetch_rss(host, port)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(url, concurrency, sizes, weights, requests=None, duration=None,
+                   keep_alive=True, seed=0):
+    """Drive the bridge at url; returns (LoadResult, RSS samples in bytes)"""
+    parts = urlsplit(url)
+    host, port, path = parts.hostname or 'localhost', parts.port or 80, parts.path or '/'
+    payloads = Payloads(path, sizes, weights, seed)
+    result = LoadResult()
+    rss = []
+    first = await fetch_rss(host, port)
+    if first is not None:
+        rss.append(first)
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(host, port, rss, stop))
+
+    sent = 0
+    deadline = None
+
+    def more():
+        nonlocal sent
+        if requests is not None and sent >= requests:
+            return False
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        sent += 1
+        return True
+
+    async def worker():
+        client = Client(host, port, path, keep_alive, result)
+        try:
+            while more():
+                await client.send(*payloads.next())
+        finally:
+            await client.close()
+
+    started = time.perf_counter()
+    if duration is not None:
+        deadline = started + duration
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        result.elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler
+    last = await fetch_rss(host, port)
+    if last is not None:
+        rss.append(last)
+    return result, rss
+
+
+def report(result, rss):
+    elapsed = result.elapsed or float('nan')
+    print(f"requests      {result.requests} in {result.elapsed:.2f} s")
+    print(f"throughput    {result.requests / elapsed:.1f} req/s, "
+          f"{result.bytes_out / elapsed / 1e6:.2f} MB/s out, {result.bytes_in / elapsed / 1e6:.2f} MB/s in")
+    rate = result.errors / result.requests if result.requests else 0.0
+    outcomes = [f'{status}: {count}' for status, count in sorted(result.statuses.items())]
+    outcomes += [f'{name}: {count}' for name, count in sorted(result.failures.items())]
+    print(f"errors        {result.errors} ({rate:.2%})   {', '.join(outcomes) or '-'}")
+    if result.latencies:
+        latencies = sorted(result.latencies)
+        cells = [f'{label} {percentile(latencies, p) * 1000:.2f}'
+                 for label, p in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99), ('p99.9', 0.999))]
+        print(f"latency ms    {'  '.join(cells)}  max {latencies[-1] * 1000:.2f}")
+    if rss:
+        mib = 1024 * 1024
+        print(f"server RSS    start {rss[0] / mib:.1f} MiB, peak {max(rss) / mib:.1f} MiB, "
+              f"end {rss[-1] / mib:.1f} MiB")
+    else:
+        print("server RSS    unavailable (no GET /metrics)")
+
+
+async def spawn_bridge(url):
+    """Start mcp_server.py and wait until its bridge listens at url"""
+    # The stdin pipe stays open so the server's stdio MCP side keeps running
+    process = subprocess.Popen(
+        [sys.executable, 'mcp_server.py'], cwd=ROOT, stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL, env={**os.environ, 'MCP_LOG_LEVEL': 'OFF'},
+    )
+    parts = urlsplit(url)
+    try:
+        await wait_for_port(parts.hostname or 'localhost', parts.port or 80, process)
+    except BaseException:
+        stop_bridge(process)
+        raise
+    return process
+
+
+def stop_bridge(process):
+    process.stdin.close()
+    process.terminate()
+    process.wait()
+
+
+async def wait_for_port(host, port, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"mcp_server.py exited with status {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return
+    raise RuntimeError(f"the bridge did not listen on {host}:{port} within {STARTUP_TIMEOUT:.0f} s")
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://localhost:8080/', help="bridge URL to POST to")
+    parser.add_argument('--concurrency', type=int, default=16, help="simultaneous connections")
+    amount = parser.add_mutually_exclusive_group()
+    amount.add_argument('--requests', type=int, help="total requests to send (default 2000)")
+    amount.add_argument('--duration', type=float, help="send requests for this many seconds instead")
+    parser.add_argument('--sizes', type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help=f"text length:weight pairs (default {DEFAULT_SIZES})")
+    parser.add_argument('--no-keep-alive', dest='keep_alive', action='store_false',
+                        help="open a new connection for every request")
+    parser.add_argument('--warmup', type=int, default=100, help="requests sent before measuring")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="start mcp_server.py for the run")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 2000
+
+    process = await spawn_bridge(args.url) if args.spawn else None
+    try:
+        sizes, weights = args.sizes
+        if args.warmup:
+            await run_load(args.url, args.concurrency, sizes, weights, requests=args.warmup,
+                           keep_alive=args.keep_alive, seed=args.seed + 1)
+        print(f"POST {args.url}  concurrency {args.concurrency}, "
+              f"keep-alive {'on' if args.keep_alive else 'off'}, sizes "
+              + ', '.join(f'{size}:{weight:g}' for size, weight in zip(sizes, weights)))
+        result, rss = await run_load(args.url, args.concurrency, sizes, weights,
+                                     requests=args.requests, duration=args.duration,
+                                     keep_alive=args.keep_alive, seed=args.seed)
+        report(result, rss)
+    finally:
+        if process is not None:
+            stop_bridge(process)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
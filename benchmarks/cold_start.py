@@ -0,0 +1,120 @@
+"""Start-up time of the example2.py server, with and without a tool manifest.
+
+    python -m benchmarks.cold_start [--runs 5]
+
+Every run starts a fresh interpreter. "mcp" is the time to import the mcp
+package and "server" the time example2.py then takes on its own (importing
+its helpers and registering the tools). "list_tools" runs from spawning
+the server over stdio until initialize + list_tools return. "heavy" lists
+the optional modules loaded at start-up; NumPy, PIL and win32 should only
+load when a tool needing them is called. "driver" is the time the first
+Paint tool call then spends creating its driver ("error" if the backend
+cannot be created here).
+
+Each row is measured with PAINT_BACKEND unset, which is what a server
+normally starts with, and with PAINT_BACKEND=mock.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(ROOT, '.tool_manifest.json')
+HEAVY = ('numpy', 'PIL', 'pywinauto', 'win32gui')
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import mcp.server.fastmcp
+imported = time.perf_counter()
+import example2
+done = time.perf_counter()
+heavy = [name for name in {HEAVY!r} if name in sys.modules]
+try:
+    example2.paint.driver
+    driver = time.perf_counter() - done
+except Exception:
+    driver = None
+print(json.dumps({{'mcp': imported - started, 'server': done - imported, 'driver': driver,
+                   'heavy': heavy}}))
+"""
+
+
+def environment(backend):
+    env = {**os.environ, 'MCP_LOG_LEVEL': 'OFF'}
+    env.pop('PAINT_BACKEND', None)
+    if backend:
+        env['PAINT_BACKEND'] = backend
+    return env
+
+
+def measure_import(env):
+    output = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+async def measure_list_tools(env):
+    params = StdioServerParameters(command=sys.executable, args=['example2.py'], cwd=ROOT, env=env)
+    started = time.perf_counter()
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            tools = (await session.list_tools()).tools
+            elapsed = time.perf_counter() - started
+    return elapsed, len(tools)
+
+
+def remove_manifest():
+    try:
+        os.remove(MANIFEST_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def run(label, runs, manifest, backend):
+    env = environment(backend)
+    samples = {'mcp': [], 'server': [], 'list_tools': []}
+    drivers = []
+    heavy = set()
+    for _ in range(runs):
+        if not manifest:
+            remove_manifest()
+        result = measure_import(env)
+        samples['mcp'].append(result['mcp'])
+        samples['server'].append(result['server'])
+        drivers.append(result['driver'])
+        heavy.update(result['heavy'])
+        if not manifest:
+            remove_manifest()
+        elapsed, count = asyncio.run(measure_list_tools(env))
+        samples['list_tools'].append(elapsed)
+    row = ''.join(f'{statistics.median(samples[key]) * 1000:>13.1f}' for key in samples)
+    driver = 'error' if None in drivers else f'{statistics.median(drivers) * 1000:.1f}'
+    print(f"{label:<26}{row}{driver:>9}   {', '.join(sorted(heavy)) or '-'}  ({count} tools)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per row")
+    args = parser.parse_args(argv)
+
+    print(f"median of {args.runs} runs, ms")
+    print(f"{'':<26}{'mcp':>13}{'server':>13}{'list_tools':>13}{'driver':>9}   heavy")
+    for backend in (None, 'mock'):
+        name = backend or 'default'
+        run(f'{name}, no manifest', args.runs, manifest=False, backend=backend)
+        # The last run above left a manifest behind for the next starts to use
+        run(f'{name}, manifest', args.runs, manifest=True, backend=backend)
+
+
+if __name__ == '__main__':
+    main()
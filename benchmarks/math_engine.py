@@ -0,0 +1,60 @@
+"""Throughput of the math engine on inputs of a million elements.
+
+    python -m benchmarks.math_engine
+
+Element-wise sums are timed with the math fallback and, when installed,
+NumPy; the time includes converting the input list. The integer section
+compares fast-doubling Fibonacci with the plain iterative loop.
+"""
+import random
+import time
+
+import math_engine
+
+SIZE = 1_000_000
+
+
+def measure(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def fibonacci_loop(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def main():
+    values = [random.uniform(0.1, 10.0) for _ in range(SIZE)]
+    backends = ['python'] + (['numpy'] if math_engine._numpy() is not None else [])
+
+    print(f"sum_of over {SIZE:,} floats (M elements/s)")
+    print(f"{'function':<8}" + ''.join(f'{name:>10}' for name in backends))
+    for name in math_engine.FUNCTIONS:
+        row = f'{name:<8}'
+        for backend in backends:
+            seconds = measure(lambda: math_engine.sum_of(name, values, backend))
+            row += f'{SIZE / seconds / 1e6:>10.1f}'
+        print(row)
+
+    print("\nExact integers")
+    assert math_engine.fibonacci(1000) == fibonacci_loop(1000)
+    n = SIZE
+    iterative = measure(lambda: fibonacci_loop(n), repeat=1)
+    doubling = measure(lambda: math_engine.fibonacci(n), repeat=1)
+    print(f"F({n:,}): iterative {iterative:.2f}s, fast doubling {doubling:.3f}s")
+    first = measure(lambda: math_engine.factorial(1000), repeat=1)
+    cached = measure(lambda: math_engine.factorial(1000))
+    print(f"1000!: first call {first * 1e3:.2f}ms, from the table {cached * 1e6:.2f}us")
+    isqrt = measure(lambda: [math_engine.sqrt(i) for i in range(SIZE)])
+    print(f"sqrt of {SIZE:,} ints (exact when square): {SIZE / isqrt / 1e6:.1f} M/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Compare one draw call per shape with a single draw_batch.
+
+    python -m benchmarks.paint_batch [--check]
+
+Runs against the mock driver, which simulates the UI latencies, and the
+headless driver, which renders with PIL. Both ways of drawing must give
+the same headless image. First the headless driver renders GOLDEN_BATCH,
+which must match GOLDEN_SHA256; --check stops after that.
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+
+from paint_driver import AsyncPaint, HeadlessPaintDriver, MockPaintDriver
+
+SIZES = (10, 100, 1000)
+
+# A fixed batch and the SHA-256 of its RGB pixels on a 200x150 canvas. Text
+# is left out: its pixels depend on the installed Pillow's default font.
+GOLDEN_BATCH = [
+    ('rectangle', 10, 10, 90, 60),
+    ('rectangle', 150, 120, 110, 70),  # corners given in reverse
+    ('line', 0, 0, 199, 149),
+    ('line', 20, 140, 180, 20),
+    ('rectangle', 40, 40, 40, 40),
+]
+GOLDEN_SHA256 = '923dcffba9320da3ade8696d50eb16ee7adf62eb0b7c69eefccd5e654d4fa299'
+
+
+def shapes(count):
+    operations = []
+    for i in range(count):
+        x, y = (i * 37) % 1000, (i * 53) % 600
+        operations.append(('rectangle', x, y, x + 80, y + 60))
+        operations.append(('line', x, y, x + 80, y + 60))
+    return operations
+
+
+async def one_by_one(paint, operations):
+    for operation in operations:
+        await paint.draw_batch([operation])
+
+
+async def batched(paint, operations):
+    await paint.draw_batch(operations)
+
+
+async def measure(make_driver, draw, operations):
+    paint = AsyncPaint(make_driver)
+    await paint.open()
+    started = time.perf_counter()
+    await draw(paint, operations)
+    return time.perf_counter() - started, paint.driver
+
+
+def check_golden():
+    driver = HeadlessPaintDriver(width=200, height=150)
+    driver.open()
+    driver.draw_batch(GOLDEN_BATCH)
+    digest = hashlib.sha256(driver.image.tobytes()).hexdigest()
+    if digest != GOLDEN_SHA256:
+        raise SystemExit(f"Headless rendering changed: {digest} != {GOLDEN_SHA256}")
+    print("headless golden image matches")
+
+
+async def main():
+    backends = {
+        'mock': lambda: MockPaintDriver(open_latency=0, activate_latency=0.005, action_latency=0.001),
+        'headless': HeadlessPaintDriver,
+    }
+    print(f"{'backend':<9} {'ops':>5} {'one by one ms':>14} {'batch ms':>9} {'speed-up':>9}")
+    for name, make_driver in backends.items():
+        for size in SIZES:
+            if name == 'mock' and size > 100:
+                continue  # Simulated latency only; larger runs add nothing
+            operations = shapes(size // 2)
+            single, single_driver = await measure(make_driver, one_by_one, operations)
+            batch, batch_driver = await measure(make_driver, batched, operations)
+            if name == 'headless':
+                assert single_driver.image.tobytes() == batch_driver.image.tobytes()
+            print(f'{name:<9} {len(operations):>5} {single * 1e3:>14.1f} '
+                  f'{batch * 1e3:>9.1f} {single / batch:>8.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--check', action='store_true', help="only check the golden image")
+    args = parser.parse_args()
+    check_golden()
+    if not args.check:
+        asyncio.run(main())
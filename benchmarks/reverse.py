@@ -0,0 +1,44 @@
+"""Compare plain slicing with grapheme-aware reversal.
+
+    python -m benchmarks.reverse
+
+ASCII only adds a check for CRLF, about 1 ns per character. Other BMP
+text without joining characters (Cyrillic, CJK, precomposed accents) is
+scanned once for them before being sliced, about 10 ns per character. Text heavy with
+combining characters or emoji should take a constant time per character
+as the input grows.
+"""
+import timeit
+
+from text_reverse import reverse_graphemes
+
+SIZES = (10_000, 100_000, 1_000_000)
+SAMPLES = {
+    'ascii': 'The quick brown fox jumps over the lazy dog. ',
+    'cyrillic': 'Съешь же ещё этих мягких французских булок. ',
+    'cjk': '漢字仮名交じり文は、日本語の普通の書き方です。',
+    'latin-1': 'Déjà vu: naïve façade, crème brûlée. ',
+    'combining': 'éàọ̈ ñ ',
+    'emoji': '\U0001F468‍\U0001F469‍\U0001F467 \U0001F44D\U0001F3FD \U0001F1EB\U0001F1F7 ',
+}
+
+
+def measure(fn, text, number):
+    return min(timeit.repeat(lambda: fn(text), number=number, repeat=5)) / number
+
+
+def main():
+    print(f"{'sample':<10} {'chars':>9} {'slice ns/char':>14} {'grapheme ns/char':>17} {'ratio':>7}")
+    for name, sample in SAMPLES.items():
+        for size in SIZES:
+            text = (sample * (size // len(sample) + 1))[:size]
+            number = max(1, 1_000_000 // size)
+            reverse_graphemes(text)  # Warm the property cache
+            sliced = measure(lambda t: t[::-1], text, number)
+            grapheme = measure(reverse_graphemes, text, number)
+            print(f'{name:<10} {size:>9} {sliced / size * 1e9:>14.2f} '
+                  f'{grapheme / size * 1e9:>17.2f} {grapheme / sliced:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Speed-up of concurrent tool calls with each execution mode.
+
+    python -m benchmarks.tool_concurrency
+
+N clients call the same tool at once over one MCP session (in-memory
+transport, so only the server is measured). A blocking tool models I/O and
+GIL-releasing work; a CPU-bound tool models pure Python. Speed-up is
+relative to running the N calls one after another; process mode can only
+scale CPU-bound work up to the number of cores.
+"""
+import asyncio
+import logging
+import os
+import time
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+import tool_executor
+from tool_executor import execution
+
+CLIENTS = (1, 2, 4, 8)
+BLOCKING_SECONDS = 0.05
+CPU_LOOPS = 1_000_000
+
+
+def blocking_work(n: int) -> int:
+    time.sleep(BLOCKING_SECONDS)
+    return n
+
+
+def cpu_work(n: int) -> int:
+    total = 0
+    for i in range(CPU_LOOPS):
+        total += i * n
+    return total
+
+
+def _named(work, name):
+    def tool(n: int) -> int:
+        return work(n)
+    tool.__name__ = tool.__qualname__ = name
+    globals()[name] = tool
+    return tool
+
+
+# Each mode needs a distinct function, and process workers must find it in the
+# registry, so the tools are wrapped when the module is imported
+TOOLS = [
+    execution(mode)(_named(work, f'{work.__name__}_{mode}'))
+    for work in (blocking_work, cpu_work)
+    for mode in tool_executor.MODES
+]
+
+
+def build_server():
+    mcp = FastMCP('bench')
+    for tool in TOOLS:
+        mcp.add_tool(tool, name=tool.__name__)
+    return mcp
+
+
+async def measure(session, tool, clients):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(session.call_tool(tool, {'n': i}) for i in range(clients)))
+    assert not any(result.isError for result in results), results
+    return time.perf_counter() - started
+
+
+async def main():
+    mcp = build_server()
+    logging.getLogger('mcp').setLevel(logging.WARNING)
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'tool':<14} {'mode':<8}" + ''.join(f'{f"N={n}":>9}' for n in CLIENTS))
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        for work in ('blocking_work', 'cpu_work'):
+            for mode in tool_executor.MODES:
+                tool = f'{work}_{mode}'
+                await measure(session, tool, 1)  # Warm up the pools
+                single = await measure(session, tool, 1)
+                row = f'{work:<14} {mode:<8}'
+                for clients in CLIENTS:
+                    elapsed = await measure(session, tool, clients)
+                    row += f'{single * clients / elapsed:>8.1f}x'
+                print(row)
+    tool_executor.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Per-call cost of the tool metrics wrapper.
+
+    python -m benchmarks.tool_metrics
+
+Times a trivial tool called directly and through FastMCP's call_tool, with
+and without instrument(), and prints the difference per call. Plain and
+measured runs alternate and the fastest of REPEAT runs is kept, so drift
+in machine load affects both alike.
+"""
+import asyncio
+import timeit
+
+from mcp.server.fastmcp import FastMCP
+
+from tool_metrics import MetricsRegistry, instrument
+
+NUMBER = 20_000
+REPEAT = 9
+
+
+def build_server(measured):
+    mcp = FastMCP('bench')
+    if measured:
+        instrument(mcp, MetricsRegistry())
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    @mcp.tool()
+    def echo(text: str) -> dict:
+        return {'content': [{'type': 'text', 'text': text}]}
+
+    return mcp, add, echo
+
+
+def per_call(plain, measured):
+    """Fastest µs per call of each, timing them in turn"""
+    times = {plain: [], measured: []}
+    for _ in range(REPEAT):
+        for fn in times:
+            times[fn].append(timeit.timeit(fn, number=NUMBER))
+    return [min(times[fn]) / NUMBER * 1e6 for fn in (plain, measured)]
+
+
+def main():
+    loop = asyncio.new_event_loop()
+    servers = {measured: build_server(measured) for measured in (False, True)}
+    text = 'x' * 4096
+
+    def calls(measured):
+        mcp, add, echo = servers[measured]
+        return [
+            lambda: add(1, 2),
+            lambda: echo(text),
+            lambda: loop.run_until_complete(mcp.call_tool('add', {'a': 1, 'b': 2})),
+        ]
+
+    print(f"{'µs per call':<24}{'plain':>10}{'measured':>10}{'overhead':>10}")
+    labels = ('add, direct', 'echo 4 KiB, direct', 'add, via call_tool')
+    for label, plain, measured in zip(labels, calls(False), calls(True)):
+        plain, measured = per_call(plain, measured)
+        print(f"{label:<24}{plain:>10.2f}{measured:>10.2f}{measured - plain:>10.2f}")
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Several tool calls from one LLM turn, run concurrently where possible.
+
+Each FUNCTION_CALL line may name its call and depend on earlier ones:
+
+    FUNCTION_CALL: a=add|2|3
+    FUNCTION_CALL: b=add|4|5
+    FUNCTION_CALL: multiply|$a|$b
+    FUNCTION_CALL: draw_rectangle|100|100|400|400 @after open
+
+`$id` is replaced by the text result of call `id` and makes the call wait
+for it; `@after id,...` only orders calls without using their results.
+`$word` where word is not the id of a call in the same response is left as
+written, so parameters such as "costs $USD 5" pass through unchanged.
+Calls are run in waves: every call whose dependencies are done is started
+at once with asyncio.gather.
+"""
+import asyncio
+import re
+
+CALL_PREFIX = "FUNCTION_CALL:"
+
+_ID = re.compile(r'^([A-Za-z_]\w*)\s*=\s*(.*)$')
+_AFTER = re.compile(r'\s*@after\s+([\w\s,]+)$')
+_REFERENCE = re.compile(r'\$([A-Za-z_]\w*)')
+
+
+class PlannedCall:
+    """One tool call of a plan, with the ids of the calls it waits for"""
+
+    def __init__(self, call_id, name, params, after=(), call_ids=None):
+        self.id = call_id
+        self.name = name
+        self.params = params
+        # $name refers to a call only if the plan has a call of that name
+        self.references = {
+            name for param in params for name in _REFERENCE.findall(param)
+            if call_ids is None or name in call_ids
+        }
+        self.depends_on = set(after) | self.references
+        self.result = None
+        self.error = None
+
+    @property
+    def text(self):
+        return "|".join([self.name, *self.params])
+
+    def resolve(self, results):
+        """Parameters with $id references replaced by those calls' results"""
+        def substitute(match):
+            name = match.group(1)
+            return results[name] if name in self.references else match.group(0)
+
+        return [_REFERENCE.sub(substitute, param) for param in self.params]
+
+
+def parse_plan(response_text):
+    """Parse every FUNCTION_CALL line of an LLM response into PlannedCalls"""
+    lines = []
+    for line in response_text.split('\n'):
+        line = line.strip()
+        if not line.startswith(CALL_PREFIX):
+            continue
+        body = line[len(CALL_PREFIX):].strip()
+
+        after = ()
+        match = _AFTER.search(body)
+        if match:
+            after = [name.strip() for name in match.group(1).split(',') if name.strip()]
+            body = body[:match.start()]
+
+        call_id = f"call{len(lines) + 1}"
+        match = _ID.match(body)
+        if match:
+            call_id, body = match.groups()
+
+        parts = [p.strip() for p in body.split("|")]
+        lines.append((call_id, parts[0], parts[1:], after))
+
+    ids = [call_id for call_id, *_ in lines]
+    calls = [PlannedCall(*line, call_ids=set(ids)) for line in lines]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Duplicate call ids in plan: {ids}")
+    for call in calls:
+        unknown = call.depends_on.difference(ids)
+        if unknown:
+            raise ValueError(f"Call {call.id} depends on unknown calls: {sorted(unknown)}")
+    return calls
+
+
+async def run_plan(calls, execute):
+    """Run the calls in dependency order, independent ones concurrently
+
+    execute(name, params) is awaited for each call and returns its result as
+    text. A failed call does not stop the others; calls that depend on it are
+    skipped. Every call ends up with either .result or .error set.
+    """
+    pending = list(calls)
+    results = {}
+    failed = set()
+    while pending:
+        for call in pending:
+            if call.depends_on & failed:
+                call.error = f"skipped, depends on failed {sorted(call.depends_on & failed)}"
+                failed.add(call.id)
+        pending = [call for call in pending if call.id not in failed]
+        wave = [call for call in pending if call.depends_on <= results.keys()]
+        if not wave:
+            for call in pending:
+                call.error = "skipped, circular dependency"
+            break
+
+        outcomes = await asyncio.gather(
+            *(execute(call.name, call.resolve(results)) for call in wave),
+            return_exceptions=True,
+        )
+        for call, outcome in zip(wave, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                call.error = str(outcome) or type(outcome).__name__
+                failed.add(call.id)
+            else:
+                call.result = outcome
+                results[call.id] = outcome
+        pending = [call for call in pending if call not in wave]
+    return calls
@@ -0,0 +1,444 @@
+"""Asyncio HTTP/1.1 bridge that lets browsers call the MCP tools.
+
+The bridge runs on the same event loop as the FastMCP server, so route
+handlers await the tool coroutines directly. Every connection is served by
+its own task and is kept open between requests (HTTP/1.1 keep-alive).
+Bodies may be JSON, MessagePack or UTF-8 frames and large responses are
+compressed when the client accepts it; see bridge_codecs.
+"""
+import asyncio
+import json
+import re
+from contextlib import suppress
+from http import HTTPStatus
+
+from bridge_codecs import (
+    COMPRESS_MIN_BYTES, FRAME_HEADER, JSON_TYPE, MSGPACK_TYPES, Compressor, compress, decode,
+    encode, msgpack, negotiate, negotiate_encoding,
+)
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15
+# Longest wait for each read of a request body, so a stalled client cannot
+# hold its connection forever
+BODY_READ_TIMEOUT = 15
+# Chunk-size lines (with extensions) and trailer fields longer than this are refused
+MAX_CHUNK_LINE_BYTES = 4096
+CHUNK_SIZE = re.compile(rb'[0-9A-Fa-f]{1,15}')
+STREAM_CHUNK_BYTES = 64 * 1024
+
+CORS_HEADERS = (
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+    b'Access-Control-Allow-Headers: Content-Type\r\n'
+)
+
+
+class HTTPError(Exception):
+    """An error that is reported to the client with the given status"""
+
+    def __init__(self, status, message=None, details=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+        self.details = details
+
+    def to_response(self):
+        error = {'error': str(self)}
+        if self.details is not None:
+            error['details'] = self.details
+        return Response.json(error, self.status)
+
+
+class Request:
+    """A parsed HTTP request whose body is read on demand"""
+
+    def __init__(self, method, target, version, headers, reader):
+        self.method = method
+        self.path, _, self.query = target.partition('?')
+        self.version = version
+        self.headers = headers
+        self._reader = reader
+        self._body = None
+        self._remaining = None
+        self._eof = False
+        # Set once the body cannot be read any further; raised again by every read
+        self._error = None
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    @property
+    def content_length(self):
+        value = self.headers.get('content-length', '')
+        if not value:
+            return 0
+        # int() would also take signs, spaces and underscores
+        if not (value.isascii() and value.isdigit()):
+            raise HTTPError(400, 'Invalid Content-Length')
+        return int(value)
+
+    @property
+    def chunked(self):
+        return 'chunked' in self.headers.get('transfer-encoding', '').lower()
+
+    @property
+    def content_type(self):
+        return self.headers.get('content-type', '').split(';')[0].strip().lower()
+
+    async def body(self):
+        """Read the whole request body"""
+        if self._body is None:
+            if self.content_length > MAX_BODY_BYTES:
+                raise HTTPError(413)
+            chunks, size = [], 0
+            async for chunk in self.iter_chunks():
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    raise HTTPError(413)
+                chunks.append(chunk)
+            self._body = b''.join(chunks)
+        return self._body
+
+    async def json(self):
+        """Read the request body and decode it as JSON"""
+        body = await self.body()
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise HTTPError(400, 'Request body is not valid JSON')
+
+    async def data(self):
+        """Read the request body and decode it according to its Content-Type
+
+        MessagePack and UTF-8 frames bodies are decoded as such (frames as a
+        list of strings); any other body is read as JSON.
+        """
+        content_type = self.content_type
+        if content_type in MSGPACK_TYPES and msgpack is None:
+            raise HTTPError(415, 'MessagePack is not supported by this server')
+        body = await self.body()
+        try:
+            return decode(body, content_type)
+        except ValueError:
+            raise HTTPError(400, f'Request body is not valid {content_type or JSON_TYPE}')
+
+    def accepts(self, *offered):
+        """The client's preferred media type among offered, by its Accept header"""
+        return negotiate(self.headers.get('accept', ''), offered)
+
+    async def iter_chunks(self, size=STREAM_CHUNK_BYTES):
+        """Yield the request body in pieces of at most size bytes
+
+        Bodies sent with chunked transfer encoding are decoded on the fly.
+        """
+        if self._remaining is None:
+            self._remaining = 0 if self.chunked else self.content_length
+        while not self._eof:
+            if not self._remaining:
+                if not self.chunked or not await self._next_chunk():
+                    self._eof = True
+                    break
+            chunk = await self._read(self._reader.read(min(size, self._remaining)))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', self._remaining)
+            self._remaining -= len(chunk)
+            if self.chunked and not self._remaining:
+                await self._read(self._reader.readexactly(2))  # CRLF after the chunk data
+            yield chunk
+
+    async def _read(self, read):
+        """Await one read of the body, giving up after BODY_READ_TIMEOUT"""
+        if self._error is not None:
+            read.close()
+            raise self._error
+        try:
+            return await asyncio.wait_for(read, BODY_READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            # The rest of the body is lost, so the connection cannot be reused
+            self._fail(408, 'Timed out reading the request body')
+
+    def _fail(self, status, message):
+        self._error = HTTPError(status, message)
+        raise self._error
+
+    async def _next_chunk(self):
+        line = await self._read_line()
+        # Plain hex digits only: int(..., 16) would also take signs and
+        # underscores, and a negative size makes read() wait for EOF
+        size = line.split(b';', 1)[0].strip()
+        if not CHUNK_SIZE.fullmatch(size):
+            self._fail(400, 'Malformed chunk size')
+        self._remaining = int(size, 16)
+        if self._remaining:
+            return True
+        # Last chunk: skip any trailer fields up to the blank line
+        while await self._read_line() not in (b'\r\n', b'\n'):
+            pass
+        return False
+
+    async def _read_line(self):
+        try:
+            line = await self._read(self._reader.readuntil(b'\n'))
+        except asyncio.LimitOverrunError:
+            line = None
+        if line is None or len(line) > MAX_CHUNK_LINE_BYTES:
+            self._fail(400, 'Chunk-size or trailer line too long')
+        return line
+
+    async def iter_lines(self):
+        """Yield the request body line by line without buffering all of it"""
+        pending = b''
+        async for chunk in self.iter_chunks():
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            if len(pending) > MAX_BODY_BYTES:
+                raise HTTPError(413, 'Line too long')
+            for line in lines:
+                yield line
+        if pending:
+            yield pending
+
+    async def iter_frames(self):
+        """Yield the strings of a UTF-8 frames body as each frame arrives"""
+        pending = bytearray()
+        async for chunk in self.iter_chunks():
+            pending += chunk
+            offset = 0
+            while len(pending) - offset >= FRAME_HEADER.size:
+                (size,) = FRAME_HEADER.unpack_from(pending, offset)
+                if size > MAX_BODY_BYTES:
+                    raise HTTPError(413, 'Frame too long')
+                end = offset + FRAME_HEADER.size + size
+                if end > len(pending):
+                    break
+                try:
+                    yield pending[offset + FRAME_HEADER.size:end].decode('utf-8')
+                except UnicodeDecodeError:
+                    raise HTTPError(400, 'Frame is not valid UTF-8')
+                offset = end
+            del pending[:offset]
+        if pending:
+            raise HTTPError(400, 'Truncated frame')
+
+    async def drain(self):
+        """Discard any unread body so the connection can be reused"""
+        if self._remaining is None and self.content_length > MAX_BODY_BYTES:
+            raise HTTPError(413)
+        size = 0
+        async for chunk in self.iter_chunks():
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413)
+
+
+class Response:
+    """An HTTP response with a fully buffered body"""
+
+    def __init__(self, body=b'', status=200, content_type='application/json', headers=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.headers = headers or {}
+
+    @classmethod
+    def json(cls, data, status=200):
+        return cls(json.dumps(data).encode('utf-8'), status)
+
+    @classmethod
+    def encoded(cls, data, media_type=JSON_TYPE, status=200):
+        """A response with data serialised as media_type (see Request.accepts)"""
+        return cls(encode(data, media_type), status, media_type)
+
+
+class StreamResponse(Response):
+    """An HTTP response whose body is sent with chunked transfer encoding
+
+    chunks is an async iterable of bytes; each item is written to the
+    client as soon as it is produced.
+    """
+
+    def __init__(self, chunks, status=200, content_type='application/json', headers=None):
+        super().__init__(b'', status, content_type, headers)
+        self.chunks = chunks
+
+
+class HTTPBridge:
+    """Minimal HTTP/1.1 server dispatching requests to async route handlers"""
+
+    def __init__(self, host='localhost', port=8080):
+        self.host = host
+        self.port = port
+        self._routes = {}
+        self._paths = set()
+        self._server = None
+
+    def route(self, method, path):
+        """Register an async handler taking a Request and returning a Response"""
+        def decorator(handler):
+            self._routes[(method, path)] = handler
+            self._paths.add(path)
+            return handler
+        return decorator
+
+    async def start(self):
+        """Start listening on the current event loop"""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), KEEP_ALIVE_TIMEOUT
+                    )
+                except HTTPError as e:
+                    await self._send(writer, e.to_response(), False)
+                    break
+                if request is None:
+                    break
+                if request.headers.get('expect', '').lower() == '100-continue':
+                    writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+                response = await self._dispatch(request)
+                keep_alive = request.keep_alive
+                encoding = negotiate_encoding(request.headers.get('accept-encoding', ''))
+                if isinstance(response, StreamResponse):
+                    # The stream may still be consuming the request body, so
+                    # leftovers are drained only after it has been sent.
+                    # HTTP/1.0 clients get it unframed and ended by close.
+                    chunked = request.version != 'HTTP/1.0'
+                    keep_alive = keep_alive and chunked
+                    await self._send_stream(writer, response, keep_alive, chunked, encoding)
+                    keep_alive = keep_alive and await self._drain(request)
+                else:
+                    keep_alive = keep_alive and await self._drain(request)
+                    await self._send(writer, response, keep_alive, encoding)
+                if not keep_alive:
+                    break
+        except (HTTPError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await writer.wait_closed()
+
+    async def _drain(self, request):
+        try:
+            await request.drain()
+            return True
+        except (HTTPError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return False
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if not e.partial:
+                return None  # Client closed an idle connection
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431)
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+        request = Request(method, target, version, headers, reader)
+        if 'transfer-encoding' in headers and not request.chunked:
+            raise HTTPError(501, 'Only chunked transfer encoding is supported')
+        return request
+
+    async def _dispatch(self, request):
+        if request.method == 'OPTIONS':
+            return Response(status=204)
+
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            status = 405 if request.path in self._paths else 404
+            return Response.json({'error': HTTPStatus(status).phrase}, status)
+
+        try:
+            return await handler(request)
+        except HTTPError as e:
+            return e.to_response()
+        except Exception as e:
+            return Response.json({'error': str(e)}, 500)
+
+    def _head(self, response, keep_alive, framing, encoding=None):
+        head = [
+            f'HTTP/1.1 {response.status} {HTTPStatus(response.status).phrase}',
+            f'Content-Type: {response.content_type}',
+            *([framing] if framing else []),
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if encoding:
+            head += [f'Content-Encoding: {encoding}', 'Vary: Accept-Encoding']
+        head.extend(f'{name}: {value}' for name, value in response.headers.items())
+        return '\r\n'.join(head).encode('latin-1') + b'\r\n' + CORS_HEADERS + b'\r\n'
+
+    def _compressible(self, response, encoding):
+        return (encoding is not None and response.status != 204
+                and 'Content-Encoding' not in response.headers)
+
+    async def _send(self, writer, response, keep_alive, encoding=None):
+        body = response.body
+        if self._compressible(response, encoding) and len(body) >= COMPRESS_MIN_BYTES:
+            body = compress(body, encoding)
+        else:
+            encoding = None
+        head = self._head(response, keep_alive, f'Content-Length: {len(body)}', encoding)
+        writer.write(head + body)
+        await writer.drain()
+
+    async def _send_stream(self, writer, response, keep_alive, chunked, encoding=None):
+        # An error mid-stream cannot change the status line any more, so it
+        # propagates and the connection is dropped without the final chunk.
+        # Streams are compressed whenever accepted: their size is not known
+        # up front, and they are what carries the large bodies.
+        framing = 'Transfer-Encoding: chunked' if chunked else None
+        compressor = Compressor(encoding) if self._compressible(response, encoding) else None
+        writer.write(self._head(response, keep_alive, framing, compressor and encoding))
+        async for chunk in self._encoded_chunks(response.chunks, compressor):
+            if not chunk:
+                continue
+            if chunked:
+                writer.write(b'%x\r\n' % len(chunk) + chunk + b'\r\n')
+            else:
+                writer.write(chunk)
+            await writer.drain()
+        if chunked:
+            writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    async def _encoded_chunks(chunks, compressor):
+        if compressor is None:
+            async for chunk in chunks:
+                yield chunk
+            return
+        async for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
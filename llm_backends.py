@@ -0,0 +1,103 @@
+"""Async LLM backends with a bounded number of in-flight requests.
+
+Every backend awaits its provider natively instead of parking a blocking
+call in a thread pool, so a request that times out is really cancelled and
+no thread is tied up per request. The number of requests in flight at once
+is capped by a semaphore.
+"""
+import asyncio
+import itertools
+import os
+import random
+
+DEFAULT_MAX_IN_FLIGHT = 8
+
+
+class LLMResponse:
+    """Minimal response object exposing .text like the Gemini responses"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class LLMBackend:
+    """Base class: subclasses implement _generate(prompt) as a coroutine"""
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'timeouts': 0, 'errors': 0, 'peak_in_flight': 0}
+
+    async def generate(self, prompt, timeout=10):
+        """Generate a response, cancelling the request if it takes longer than timeout
+
+        The timeout starts once a slot is free; waiting for a slot is not
+        counted against it.
+        """
+        async with self._slots:
+            self.in_flight += 1
+            self.stats['requests'] += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+            try:
+                return await asyncio.wait_for(self._generate(prompt), timeout)
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                raise
+            except Exception:
+                self.stats['errors'] += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def _generate(self, prompt):
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the library's native async client"""
+
+    def __init__(self, model_name='gemini-2.0-flash', api_key=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        super().__init__(max_in_flight)
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    async def _generate(self, prompt):
+        return await self.model.generate_content_async(prompt)
+
+
+class FakeBackend(LLMBackend):
+    """Offline backend with simulated latency, for load tests without an API key
+
+    responses is either a callable taking the prompt and returning the text,
+    or an iterable of texts that is cycled through.
+    """
+
+    def __init__(self, responses=("FINAL_ANSWER: [0]",), latency=0.05, jitter=0.0,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        super().__init__(max_in_flight)
+        self.latency = latency
+        self.jitter = jitter
+        if callable(responses):
+            self._respond = responses
+        else:
+            cycle = itertools.cycle(list(responses))
+            self._respond = lambda prompt: next(cycle)
+
+    async def _generate(self, prompt):
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        return LLMResponse(self._respond(prompt))
+
+
+def create_backend(name, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+    """Build a backend by name: 'gemini' or 'fake'"""
+    if name == 'gemini':
+        return GeminiBackend(max_in_flight=max_in_flight)
+    if name == 'fake':
+        return FakeBackend(max_in_flight=max_in_flight)
+    raise ValueError(f"Unknown LLM backend: {name}")
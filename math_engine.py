@@ -0,0 +1,183 @@
+"""Exact big-integer and vectorized math for the calculator tools.
+
+Integer results stay exact: roots and quotients are only converted to float
+when they are not whole numbers, Fibonacci numbers use fast doubling and
+factorials come from a table that is extended as needed.
+
+Element-wise functions over lists use NumPy when it is installed and the
+list is long enough to amortise the conversion; otherwise they fall back to
+the math module. NumPy is only imported by the first such call. Both paths
+raise the same errors as math: ValueError outside a function's domain and
+OverflowError when a result is too large.
+"""
+import functools
+import math
+
+# Below this length converting to an array costs more than it saves
+NUMPY_MIN_SIZE = 64
+
+# Factorials up to this n are kept; larger ones are computed directly
+FACTORIAL_TABLE_SIZE = 1024
+
+FUNCTIONS = {
+    'sin': (math.sin, 'sin'),
+    'cos': (math.cos, 'cos'),
+    'tan': (math.tan, 'tan'),
+    'log': (math.log, 'log'),
+    'sqrt': (math.sqrt, 'sqrt'),
+    'exp': (math.exp, 'exp'),
+}
+
+_factorials = [1]
+
+
+def _function(name):
+    try:
+        return FUNCTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown function {name!r}, expected one of {', '.join(FUNCTIONS)}")
+
+
+@functools.cache
+def _numpy():
+    """The numpy module, or None when it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _use_numpy(values, backend):
+    if backend == 'python':
+        return False
+    if backend == 'numpy':
+        if _numpy() is None:
+            raise ValueError("NumPy is not installed")
+        return True
+    return len(values) >= NUMPY_MIN_SIZE and _numpy() is not None
+
+
+def _numpy_apply(name, values):
+    np = _numpy()
+    array = np.asarray(values, dtype=np.float64)
+    try:
+        with np.errstate(over='raise', invalid='raise', divide='raise'):
+            return getattr(np, name)(array)
+    except FloatingPointError as e:
+        if 'overflow' in str(e):
+            raise OverflowError('math range error')
+        raise ValueError('math domain error')
+
+
+def apply(name, values, backend=None):
+    """Apply the named function to every element of values"""
+    fn, numpy_name = _function(name)
+    if _use_numpy(values, backend):
+        return _numpy_apply(numpy_name, values).tolist()
+    return [fn(x) for x in values]
+
+
+def sum_of(name, values, backend=None):
+    """Sum of the named function over values, e.g. sum_of('exp', [1, 2])
+
+    backend forces 'numpy' or 'python'; by default it is chosen by size.
+    """
+    fn, numpy_name = _function(name)
+    if _use_numpy(values, backend):
+        with _numpy().errstate(over='raise'):
+            try:
+                return float(_numpy_apply(numpy_name, values).sum())
+            except FloatingPointError:
+                raise OverflowError('math range error')
+    return math.fsum(map(fn, values))
+
+
+def divide(a, b):
+    """a / b, as an exact int when b divides a"""
+    if b == 0:
+        raise ZeroDivisionError('division by zero')
+    if isinstance(a, int) and isinstance(b, int) and a % b == 0:
+        return a // b
+    return a / b
+
+
+def iroot(n, k):
+    """Largest integer r with r**k <= n, for n >= 0"""
+    if n < 0:
+        raise ValueError('iroot of a negative number')
+    if n < 2:
+        return n
+    if k == 2:
+        return math.isqrt(n)
+    # Newton's method from an overestimate, all in integers
+    r = 1 << -(-n.bit_length() // k)
+    while True:
+        s = ((k - 1) * r + n // r ** (k - 1)) // k
+        if s >= r:
+            return r
+        r = s
+
+
+def sqrt(a):
+    """Square root: exact for perfect squares, float otherwise"""
+    if a < 0:
+        raise ValueError('math domain error')
+    if isinstance(a, int):
+        r = math.isqrt(a)
+        if r * r == a:
+            return r
+    return math.sqrt(a)
+
+
+def cbrt(a):
+    """Cube root, defined for negative numbers too"""
+    if isinstance(a, int):
+        r = iroot(abs(a), 3)
+        if r ** 3 == abs(a):
+            return r if a >= 0 else -r
+    if hasattr(math, 'cbrt'):
+        return math.cbrt(a)
+    return math.copysign(abs(a) ** (1 / 3), a)
+
+
+def factorial(n):
+    """n! from the cached table, computing and storing missing entries"""
+    if n < 0:
+        raise ValueError('factorial() not defined for negative values')
+    if n >= FACTORIAL_TABLE_SIZE:
+        return math.factorial(n)
+    table = _factorials
+    while len(table) <= n:
+        table.append(table[-1] * len(table))
+    return table[n]
+
+
+def _fib_pair(n):
+    """(F(n), F(n+1)) by fast doubling, O(log n) big-integer multiplications"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        # F(2k) = F(k) * (2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2
+        a, b = a * (2 * b - a), a * a + b * b
+        if bit == '1':
+            a, b = b, a + b
+    return a, b
+
+
+def fibonacci(n):
+    """The n-th Fibonacci number, F(0) = 0"""
+    if n < 0:
+        raise ValueError('fibonacci() not defined for negative values')
+    return _fib_pair(n)[0]
+
+
+def fibonacci_numbers(n):
+    """The first n Fibonacci numbers"""
+    if n <= 0:
+        return []
+    numbers = [0] * n
+    a, b = 0, 1
+    for i in range(n):
+        numbers[i] = a
+        a, b = b, a + b
+    return numbers
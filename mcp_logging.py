@@ -0,0 +1,140 @@
+"""Logging for the MCP servers and the agent, kept off stdout.
+
+A stdio server's stdout is its JSON-RPC channel, so nothing may be printed
+there. setup_logging() sends records to stderr or a file through a queue:
+the calling thread only enqueues the record and a background listener does
+the formatting and I/O.
+
+Configured from the environment unless given explicitly:
+
+    MCP_LOG_LEVEL   DEBUG, INFO (default), WARNING, ERROR or OFF
+    MCP_LOG_FILE    append to this file instead of stderr
+    MCP_LOG_FORMAT  text (default) or json
+
+OFF disables logging entirely; log_tool_calls() then leaves the tools
+unwrapped, so disabled logging costs nothing per call.
+"""
+import atexit
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Extra fields attached to tool call records, emitted by JsonFormatter
+CALL_FIELDS = ('tool', 'status', 'duration_ms')
+
+logger = logging.getLogger('mcp_tools')
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including the per-call timing fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CALL_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def setup_logging(level=None, file=None, format=None):
+    """Route the root logger through a queue to stderr or a file
+
+    Call it before creating the FastMCP server, so the server keeps these
+    handlers instead of installing its own. Returns the effective level, or
+    None when logging is disabled.
+    """
+    global _listener
+    level = (level or os.getenv('MCP_LOG_LEVEL') or 'INFO').upper()
+    file = file or os.getenv('MCP_LOG_FILE')
+    format = (format or os.getenv('MCP_LOG_FORMAT') or 'text').lower()
+
+    root = logging.getLogger()
+    _flush()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    if level == 'OFF':
+        logging.disable(logging.CRITICAL)
+        # Keeps logging.basicConfig (used by FastMCP) from adding a handler
+        root.addHandler(logging.NullHandler())
+        return None
+    logging.disable(logging.NOTSET)
+
+    if file:
+        target = logging.FileHandler(file, encoding='utf-8')
+    else:
+        target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(JsonFormatter() if format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    records = queue.SimpleQueue()
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+    _listener = logging.handlers.QueueListener(records, target, respect_handler_level=True)
+    _listener.start()
+    return root.level
+
+
+@atexit.register
+def _flush():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_tool_calls(mcp, log=logger):
+    """Log every tool call on mcp at INFO level with its duration
+
+    Wraps the tools registered so far, so call it after the last tool is
+    registered and before the server starts. Nothing is wrapped unless INFO
+    is enabled at that point.
+    """
+    if not log.isEnabledFor(logging.INFO):
+        return
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = _timed(tool.fn, tool.name, tool.is_async, log)
+
+
+def _timed(fn, name, is_async, log):
+    def record(status, started):
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        log.info('tool %s %s in %.3f ms', name, status, duration_ms,
+                 extra={'tool': name, 'status': status, 'duration_ms': duration_ms})
+
+    if is_async:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started, status = time.perf_counter(), 'error'
+            try:
+                result = await fn(*args, **kwargs)
+                status = 'ok'
+                return result
+            finally:
+                record(status, started)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started, status = time.perf_counter(), 'error'
+            try:
+                result = fn(*args, **kwargs)
+                status = 'ok'
+                return result
+            finally:
+                record(status, started)
+    return wrapper
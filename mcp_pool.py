@@ -0,0 +1,202 @@
+"""A pool of warm MCP client sessions that outlives individual queries.
+
+Starting a stdio server means spawning a process, importing its modules and
+running initialize + list_tools. MCPSessionPool pays that once per
+connection and then shares the sessions between callers: a ClientSession
+multiplexes concurrent requests, so callers are spread over the
+connections instead of queueing for exclusive use. Connections that fail a
+call or a health check are replaced transparently.
+"""
+import asyncio
+import time
+
+import anyio
+from mcp import ClientSession
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+# Errors that mean the connection itself is gone, not that the call failed
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+    EOFError,
+)
+
+
+class PooledConnection:
+    """One server process and its session, owned by a dedicated task
+
+    The stdio transport and the session are anyio context managers that must
+    be entered and exited in the same task, so a background task holds them
+    open until close() is called.
+    """
+
+    def __init__(self, server_params):
+        self.server_params = server_params
+        self.session = None
+        self.tools = None
+        self.timings = {}
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self._ready = None
+        self._closing = None
+        self._task = None
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        await self._ready
+
+    async def _run(self):
+        try:
+            started = time.perf_counter()
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    self.timings['connect'] = time.perf_counter() - started
+                    started = time.perf_counter()
+                    self.tools = (await session.list_tools()).tools
+                    self.timings['list_tools'] = time.perf_counter() - started
+                    self.session = session
+                    self._ready.set_result(None)
+                    await self._closing.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self.session = None
+
+    @property
+    def alive(self):
+        return self.session is not None and not self._task.done()
+
+    async def ping(self, timeout):
+        await asyncio.wait_for(self.session.send_ping(), timeout)
+
+    async def close(self):
+        if self._task is not None:
+            self._closing.set()
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+
+
+class MCPSessionPool:
+    """Keeps `size` warm sessions to one MCP server and reconnects on failure
+
+    Use it as an async context manager:
+
+        async with MCPSessionPool(server_params, size=2) as pool:
+            tools = pool.tools
+            result = await pool.call_tool('add', {'a': 1, 'b': 2})
+    """
+
+    def __init__(self, server_params, size=1, health_check_interval=30.0, health_check_timeout=5.0):
+        self.server_params = server_params
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.reconnects = 0
+        self._connections = []
+        self._opening = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start_soon(self):
+        """Start opening all connections concurrently and return the future
+
+        Calls made before it completes wait for it, so work that does not
+        need the server can overlap with the server start-up.
+        """
+        self._connections = [PooledConnection(self.server_params) for _ in range(self.size)]
+        self._opening = asyncio.gather(*(connection.open() for connection in self._connections))
+        return self._opening
+
+    async def start(self):
+        await self.start_soon()
+
+    async def ready(self):
+        """Wait until the connections opened by start_soon() are up"""
+        if self._opening is not None:
+            await self._opening
+
+    async def close(self):
+        if self._opening is not None:
+            await asyncio.gather(self._opening, return_exceptions=True)
+        await asyncio.gather(*(connection.close() for connection in self._connections))
+        self._connections = []
+
+    @property
+    def tools(self):
+        """Tool list fetched when the connections were opened"""
+        for connection in self._connections:
+            if connection.tools is not None:
+                return connection.tools
+        return []
+
+    @property
+    def timings(self):
+        """Seconds the first open connection took to connect and to list its tools"""
+        for connection in self._connections:
+            if connection.tools is not None:
+                return connection.timings
+        return {}
+
+    async def acquire(self):
+        """Return the least busy healthy connection, reconnecting if needed"""
+        await self.ready()
+        connection = min(self._connections, key=lambda c: c.in_flight)
+        idle = time.monotonic() - connection.last_used
+        if not connection.alive:
+            connection = await self._reconnect(connection)
+        elif idle > self.health_check_interval and not connection.in_flight:
+            try:
+                await connection.ping(self.health_check_timeout)
+            except (asyncio.TimeoutError, McpError, *CONNECTION_ERRORS):
+                connection = await self._reconnect(connection)
+        return connection
+
+    async def call_tool(self, name, arguments=None, retries=1):
+        """Call a tool on a pooled session, retrying on a fresh connection if it dies"""
+        while True:
+            connection = await self.acquire()
+            connection.in_flight += 1
+            try:
+                return await connection.session.call_tool(name, arguments=arguments)
+            except (McpError, *CONNECTION_ERRORS) as e:
+                if isinstance(e, McpError) and e.error.code != CONNECTION_CLOSED:
+                    raise
+                if retries <= 0:
+                    raise
+                retries -= 1
+                await self._reconnect(connection)
+            finally:
+                connection.in_flight -= 1
+                connection.last_used = time.monotonic()
+
+    async def _reconnect(self, connection):
+        async with self._lock:
+            if connection not in self._connections:
+                # Another caller already replaced it
+                return min(self._connections, key=lambda c: c.in_flight)
+            await connection.close()
+            replacement = PooledConnection(self.server_params)
+            await replacement.open()
+            self._connections[self._connections.index(connection)] = replacement
+            self.reconnects += 1
+            return replacement
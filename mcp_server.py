@@ -1,68 +1,215 @@
 from mcp.server.fastmcp import FastMCP
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http_bridge import HTTPBridge, HTTPError, Response, StreamResponse
+from bridge_codecs import (
+    FRAMES_TYPE, JSON_TYPE, MSGPACK_TYPE, encode, encode_frames, msgpack_map_of_list,
+)
+from text_reverse import iter_reversed_utf8, reverse_graphemes
+from tool_gateway import mount_tools
+from mcp_logging import setup_logging, log_tool_calls
+from tool_metrics import default_registry, instrument
+import asyncio
 import json
-import threading
+import logging
+import os
+import tempfile
+
+# Batches larger than this are streamed back in groups of this many results
+BATCH_GROUP_SIZE = 256
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson')
+# Encodings the reversal endpoints can answer in, by the client's Accept header
+TEXT_TYPES = (JSON_TYPE, MSGPACK_TYPE, FRAMES_TYPE)
+
+# Streamed texts are reversed this many bytes at a time; bodies larger than
+# STREAM_SPOOL_BYTES are spooled to a temporary file instead of memory, and
+# the file is written and read in a worker thread. At most MAX_STREAMS
+# bodies of MAX_STREAM_BYTES each are spooled at once.
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_SPOOL_BYTES = 1024 * 1024
+MAX_STREAM_BYTES = int(os.getenv('MCP_STREAM_MAX_BYTES', 64 * 1024 * 1024))
+MAX_STREAMS = int(os.getenv('MCP_MAX_STREAMS', 4))
+
+# Log to stderr (or MCP_LOG_FILE): stdout is the stdio transport
+setup_logging()
+logger = logging.getLogger(__name__)
 
 # Create MCP server instance
 mcp = FastMCP("String Reverser")
+# Count and time every tool, resource and prompt declared below, including
+# the bridge's direct calls to them
+instrument(mcp)
 
+# Not memoized: building a cache key and sizing the result cost more than
+# reversing the text
 @mcp.tool()
-async def reverse_string(text: str) -> dict:
-    """Reverse a given string"""
+async def reverse_string(text: str, graphemes: bool = False) -> dict:
+    """Reverse a given string, optionally keeping grapheme clusters (accents, emoji) intact"""
     return {
         "content": [
             {
                 "type": "text",
-                "text": text[::-1]
+                "text": reverse_graphemes(text) if graphemes else text[::-1]
             }
         ]
     }
 
-# HTTP server to handle browser requests
-class RequestHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-
-    def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        data = json.loads(post_data.decode('utf-8'))
-        
-        text = data.get('text', '')
-        
-        # Use our MCP tool directly
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+# Calls, errors, latency percentiles and payload sizes per handler
+@mcp.resource("metrics://tools")
+def get_tool_metrics() -> str:
+    """Get call metrics for every tool, resource and prompt"""
+    return json.dumps(default_registry.snapshot())
+
+# HTTP bridge to handle browser requests
+bridge = HTTPBridge('localhost', 8080)
+
+@bridge.route('POST', '/')
+async def handle_reverse(request):
+    data = await request.data()
+    if request.content_type == FRAMES_TYPE:
+        # One text, possibly split over several frames
+        data = {'text': ''.join(data)}
+    if not isinstance(data, dict) or not isinstance(data.get('text', ''), str):
+        raise HTTPError(400, 'Expected a JSON object with a "text" string')
+
+    # Await our MCP tool directly on the shared event loop
+    result = await reverse_string(data.get('text', ''), bool(data.get('graphemes')))
+    reversed_text = result['content'][0]['text']
+    media_type = request.accepts(request.content_type, *TEXT_TYPES)
+    if media_type == FRAMES_TYPE:
+        return Response.encoded([reversed_text], media_type)
+    return Response.encoded({'reversed': reversed_text}, media_type)
+
+async def reverse_groups(texts):
+    """Reverse texts in order, yielding the results in groups as they finish"""
+    group = []
+    async for text in texts:
+        if isinstance(text, str):
+            result = await reverse_string(text)
+            group.append({'reversed': result['content'][0]['text']})
+        else:
+            group.append({'error': 'Expected a string or an object with a "text" string'})
+        if len(group) >= BATCH_GROUP_SIZE:
+            yield group
+            group = []
+    if group:
+        yield group
+
+async def iter_texts(texts):
+    for text in texts:
+        yield text
+
+async def iter_ndjson_texts(request):
+    async for line in request.iter_lines():
+        if not line.strip():
+            continue
         try:
-            result = loop.run_until_complete(reverse_string(text))
-            reversed_text = result['content'][0]['text']
-        finally:
-            loop.close()
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        
-        response = json.dumps({'reversed': reversed_text})
-        self.wfile.write(response.encode('utf-8'))
-
-def run_http_server():
-    server = HTTPServer(('localhost', 8080), RequestHandler)
-    print("HTTP Server running on http://localhost:8080")
-    server.serve_forever()
+            item = json.loads(line)
+        except ValueError:
+            item = None
+        yield item.get('text') if isinstance(item, dict) else item
+
+async def ndjson_batch_body(request):
+    async for group in reverse_groups(iter_ndjson_texts(request)):
+        yield ''.join(json.dumps(item) + '\n' for item in group).encode('utf-8')
+
+async def frames_batch_body(texts):
+    async for group in reverse_groups(texts):
+        yield encode_frames(item['reversed'] for item in group)
+
+async def msgpack_batch_body(texts):
+    yield msgpack_map_of_list('reversed', len(texts))
+    async for group in reverse_groups(iter_texts(texts)):
+        yield b''.join(encode(item['reversed'], MSGPACK_TYPE) for item in group)
+
+async def json_batch_body(texts):
+    separator = ''
+    yield b'{"reversed": ['
+    async for group in reverse_groups(iter_texts(texts)):
+        yield (separator + ', '.join(json.dumps(item['reversed']) for item in group)).encode('utf-8')
+        separator = ', '
+    yield b']}'
+
+@bridge.route('POST', '/batch')
+async def handle_reverse_batch(request):
+    # NDJSON batches are read and answered line by line, in order
+    if request.content_type in NDJSON_TYPES:
+        return StreamResponse(ndjson_batch_body(request), content_type='application/x-ndjson')
+    # So are chunked UTF-8 frames bodies, frame by frame
+    if request.content_type == FRAMES_TYPE and request.chunked:
+        return StreamResponse(frames_batch_body(request.iter_frames()), content_type=FRAMES_TYPE)
+
+    data = await request.data()
+    texts = data.get('texts') if isinstance(data, dict) else data
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise HTTPError(400, 'Expected a JSON array of strings or an object with a "texts" array')
+
+    media_type = request.accepts(request.content_type, *TEXT_TYPES)
+    if len(texts) <= BATCH_GROUP_SIZE:
+        results = [(await reverse_string(text))['content'][0]['text'] for text in texts]
+        if media_type == FRAMES_TYPE:
+            return Response.encoded(results, media_type)
+        return Response.encoded({'reversed': results}, media_type)
+    if media_type == FRAMES_TYPE:
+        return StreamResponse(frames_batch_body(iter_texts(texts)), content_type=media_type)
+    if media_type == MSGPACK_TYPE:
+        return StreamResponse(msgpack_batch_body(texts), content_type=media_type)
+    return StreamResponse(json_batch_body(texts))
+
+@bridge.route('GET', '/metrics')
+async def handle_metrics(request):
+    # Same data as the metrics://tools resource
+    return Response.encoded(default_registry.snapshot(), request.accepts(JSON_TYPE, MSGPACK_TYPE))
+
+stream_slots = asyncio.Semaphore(MAX_STREAMS)
+
+async def reversed_stream_body(spool, on_disk):
+    # Holds the request's stream slot until the spool is gone
+    try:
+        with spool:
+            chunks = iter_reversed_utf8(spool, STREAM_CHUNK_BYTES)
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None) if on_disk else next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+    finally:
+        stream_slots.release()
+
+@bridge.route('POST', '/stream')
+async def handle_reverse_stream(request):
+    # The last character has to arrive before the first one can be sent, so
+    # the raw UTF-8 body is spooled and then read back to front in chunks
+    if stream_slots.locked():
+        raise HTTPError(503, f"Too many concurrent streams (at most {MAX_STREAMS})")
+    await stream_slots.acquire()
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_BYTES)
+    size = 0
+    try:
+        async for chunk in request.iter_chunks(STREAM_CHUNK_BYTES):
+            size += len(chunk)
+            if size > MAX_STREAM_BYTES:
+                raise HTTPError(413, f"Streamed texts are limited to {MAX_STREAM_BYTES} bytes")
+            if size > STREAM_SPOOL_BYTES:
+                # On disk from here on; keep file writes off the event loop
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+    except BaseException:
+        spool.close()
+        stream_slots.release()
+        raise
+    return StreamResponse(reversed_stream_body(spool, size > STREAM_SPOOL_BYTES),
+                          content_type='text/plain; charset=utf-8')
+
+async def main():
+    log_tool_calls(mcp)
+    # Expose every registered tool as POST /tools/<name>
+    mount_tools(bridge, mcp)
+    await bridge.start()
+    logger.info("HTTP Server running on http://localhost:8080")
+
+    # Run the MCP server on the same event loop as the HTTP bridge
+    logger.info("Starting MCP String Reverser server...")
+    await mcp.run_stdio_async()
 
 if __name__ == "__main__":
-    # Start HTTP server in a separate thread
-    http_thread = threading.Thread(target=run_http_server)
-    http_thread.daemon = True
-    http_thread.start()
-    
-    # Start MCP server in main thread
-    print("Starting MCP String Reverser server...")
-    mcp.run() 
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,348 @@
+"""UI-automation drivers behind the Paint tools.
+
+Drivers do the blocking work (starting Paint, moving the mouse, typing) and
+wait for the UI to actually be ready instead of sleeping for fixed times:
+every step polls its readiness condition until it holds or a timeout
+expires. AsyncPaint runs a driver in a worker thread, so the MCP server's
+event loop keeps serving other requests while Paint is being driven. It
+creates the driver on first use, and the win32 driver imports pywinauto and
+the win32 modules only when it opens Paint, so importing a server that
+offers the Paint tools loads none of them.
+
+The backend is picked with the PAINT_BACKEND environment variable:
+
+    win32     drive Microsoft Paint (default)
+    mock      simulate Paint with configurable latencies
+    headless  draw into an in-memory PIL image
+
+The simulated backends are only used when asked for: without Windows,
+pywin32 and pywinauto the default backend fails instead of pretending to
+draw.
+
+Drawing goes through draw_batch(), which takes a list of operations:
+
+    ('rectangle', x1, y1, x2, y2)
+    ('line', x1, y1, x2, y2)
+    ('text', text, x, y)
+
+A batch activates the window and computes the canvas geometry once, and
+only switches tools when the next operation needs a different one.
+"""
+import asyncio
+import os
+import sys
+import time
+
+DEFAULT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.02
+
+# Canvas position inside the maximised Paint window (ribbon and borders)
+CANVAS_OFFSET = (10, 160)
+
+# Keyboard shortcut selecting the Paint tool for each operation
+TOOL_KEYS = {'rectangle': '{R}', 'line': '{L}', 'text': '{T}'}
+
+_OPERATION_FIELDS = {
+    'rectangle': ('x1', 'y1', 'x2', 'y2'),
+    'line': ('x1', 'y1', 'x2', 'y2'),
+    'text': ('text', 'x', 'y'),
+}
+
+
+class PaintNotOpenError(RuntimeError):
+    def __init__(self):
+        super().__init__("Paint is not open. Please call open_paint first.")
+
+
+def wait_until(condition, timeout=DEFAULT_TIMEOUT, interval=POLL_INTERVAL, what='condition'):
+    """Poll condition() until it returns a truthy value and return that value
+
+    Raises TimeoutError if it is still false after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        value = condition()
+        if value:
+            return value
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out after {timeout}s waiting for {what}")
+        time.sleep(interval)
+
+
+def parse_operations(operations):
+    """Validate drawing operations given as dicts and return them as tuples
+
+    Each dict names its kind in 'op' ('rectangle', 'line' or 'text') and
+    carries that kind's fields, e.g. {"op": "text", "text": "Hi", "x": 5, "y": 5}.
+    """
+    parsed = []
+    for i, operation in enumerate(operations):
+        kind = operation.get('op') if isinstance(operation, dict) else None
+        fields = _OPERATION_FIELDS.get(kind)
+        if fields is None:
+            raise ValueError(f"Operation {i}: op must be one of {sorted(_OPERATION_FIELDS)}")
+        missing = [name for name in fields if name not in operation]
+        if missing:
+            raise ValueError(f"Operation {i} ({kind}): missing {', '.join(missing)}")
+        try:
+            values = [str(operation[name]) if name == 'text' else int(operation[name]) for name in fields]
+        except (TypeError, ValueError):
+            raise ValueError(f"Operation {i} ({kind}): coordinates must be integers")
+        parsed.append((kind, *values))
+    return parsed
+
+
+class PaintDriver:
+    """Blocking Paint operations; coordinates are relative to the canvas"""
+
+    timeout = DEFAULT_TIMEOUT
+
+    @property
+    def is_open(self):
+        raise NotImplementedError
+
+    def open(self):
+        raise NotImplementedError
+
+    def draw_batch(self, operations):
+        """Run parsed operations in order in one session"""
+        raise NotImplementedError
+
+    def draw_rectangle(self, x1, y1, x2, y2):
+        self.draw_batch([('rectangle', x1, y1, x2, y2)])
+
+    def add_text(self, text, x, y):
+        self.draw_batch([('text', text, x, y)])
+
+
+class Win32PaintDriver(PaintDriver):
+    """Drives Microsoft Paint through pywinauto and the win32 API"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._app = None
+        self._hwnd = None
+
+    @property
+    def is_open(self):
+        return self._hwnd is not None and self._win32gui.IsWindow(self._hwnd)
+
+    def _import(self):
+        # Imported on first open: they take a noticeable part of a server's
+        # start-up and only load on Windows
+        try:
+            import win32api
+            import win32con
+            import win32gui
+            from pywinauto.application import Application
+            from pywinauto.keyboard import send_keys
+        except ImportError as e:
+            raise RuntimeError(f"The win32 Paint backend needs pywin32 and pywinauto ({e}); "
+                               "set PAINT_BACKEND=mock or headless to simulate Paint") from e
+
+        self._win32api = win32api
+        self._win32con = win32con
+        self._win32gui = win32gui
+        self._application = Application
+        self._send_keys = send_keys
+
+    def open(self):
+        self._import()
+        self._app = self._application(backend='uia').start('mspaint.exe')
+        window = self._app.window(class_name='MSPaintApp')
+        window.wait('exists visible enabled ready', timeout=self.timeout)
+        self._hwnd = window.handle
+        window.maximize()
+        wait_until(lambda: self._win32gui.IsZoomed(self._hwnd), self.timeout, what='Paint to maximise')
+        self._wait_idle()
+
+    def draw_batch(self, operations):
+        left, top = self._activate()
+        tool = None
+        for kind, *args in operations:
+            if kind != tool:
+                self._select_tool(TOOL_KEYS[kind])
+                tool = kind
+            if kind == 'text':
+                text, x, y = args
+                self._click((left + x, top + y))
+                self._wait_idle()
+                self._send_keys(text, with_spaces=True)
+                # Click outside the text box to commit it; this leaves the
+                # text tool active for the next text operation
+                self._click((left + x + 100, top + y + 100))
+            else:
+                x1, y1, x2, y2 = args
+                self._drag((left + x1, top + y1), (left + x2, top + y2))
+            self._wait_idle()
+
+    def _activate(self):
+        """Bring Paint to the front maximised and return the canvas origin"""
+        if not self.is_open:
+            raise PaintNotOpenError()
+        gui = self._win32gui
+        if not gui.IsZoomed(self._hwnd):
+            gui.ShowWindow(self._hwnd, self._win32con.SW_MAXIMIZE)
+            wait_until(lambda: gui.IsZoomed(self._hwnd), self.timeout, what='Paint to maximise')
+        if gui.GetForegroundWindow() != self._hwnd:
+            gui.SetForegroundWindow(self._hwnd)
+            wait_until(lambda: gui.GetForegroundWindow() == self._hwnd, self.timeout,
+                       what='Paint to come to the front')
+        window_left, window_top, _, _ = gui.GetWindowRect(self._hwnd)
+        return window_left + CANVAS_OFFSET[0], window_top + CANVAS_OFFSET[1]
+
+    def _select_tool(self, key):
+        self._send_keys(key)
+        self._wait_idle()
+
+    def _move(self, position):
+        self._win32api.SetCursorPos(position)
+        wait_until(lambda: self._win32api.GetCursorPos() == position, self.timeout, what='the cursor')
+
+    def _click(self, position):
+        self._move(position)
+        self._win32api.mouse_event(self._win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+        self._win32api.mouse_event(self._win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+
+    def _drag(self, start, end):
+        self._move(start)
+        self._win32api.mouse_event(self._win32con.MOUSEEVENTF_LEFTDOWN, 0, 0, 0, 0)
+        self._move(end)
+        self._win32api.mouse_event(self._win32con.MOUSEEVENTF_LEFTUP, 0, 0, 0, 0)
+
+    def _wait_idle(self):
+        """Wait until Paint has processed its pending input"""
+        self._app.wait_cpu_usage_lower(threshold=5, timeout=self.timeout, usage_interval=0.05)
+
+
+class MockPaintDriver(PaintDriver):
+    """Simulated Paint for tests and benchmarks on any platform
+
+    Each operation blocks for the given latency, like the real UI, and is
+    recorded in .operations; every batch first pays activate_latency for
+    focusing the window and measuring the canvas. Opening becomes ready
+    after open_latency and is waited for with the same polling as the real
+    driver.
+    """
+
+    def __init__(self, open_latency=0.2, activate_latency=0.02, action_latency=0.01,
+                 timeout=DEFAULT_TIMEOUT):
+        self.open_latency = open_latency
+        self.activate_latency = activate_latency
+        self.action_latency = action_latency
+        self.timeout = timeout
+        self.operations = []
+        self._ready_at = None
+
+    @property
+    def is_open(self):
+        return self._ready_at is not None
+
+    def open(self):
+        ready_at = time.monotonic() + self.open_latency
+        wait_until(lambda: time.monotonic() >= ready_at, self.timeout, what='Paint to open')
+        self._ready_at = ready_at
+        self.operations.append(('open',))
+
+    def draw_batch(self, operations):
+        if not self.is_open:
+            raise PaintNotOpenError()
+        time.sleep(self.activate_latency)
+        for operation in operations:
+            time.sleep(self.action_latency)
+            self.operations.append(tuple(operation))
+
+
+class HeadlessPaintDriver(PaintDriver):
+    """Draws into an in-memory PIL image instead of Paint
+
+    The result is available as .image, so batches can be benchmarked and
+    compared against reference images without Windows.
+    """
+
+    def __init__(self, width=1200, height=800):
+        self.width = width
+        self.height = height
+        self.image = None
+        self._draw = None
+
+    @property
+    def is_open(self):
+        return self.image is not None
+
+    def open(self):
+        from PIL import Image, ImageDraw
+
+        self.image = Image.new('RGB', (self.width, self.height), 'white')
+        self._draw = ImageDraw.Draw(self.image)
+
+    def draw_batch(self, operations):
+        if not self.is_open:
+            raise PaintNotOpenError()
+        draw = self._draw
+        for kind, *args in operations:
+            if kind == 'rectangle':
+                x1, y1, x2, y2 = args
+                draw.rectangle((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)), outline='black')
+            elif kind == 'line':
+                draw.line(args, fill='black')
+            else:
+                text, x, y = args
+                draw.text((x, y), text, fill='black')
+
+
+class AsyncPaint:
+    """Runs a PaintDriver off the event loop, one UI operation at a time
+
+    The driver is made by factory (create_driver by default) on first use.
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or create_driver
+        self._driver = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = self._factory()
+        return self._driver
+
+    @property
+    def is_open(self):
+        return self._driver is not None and self._driver.is_open
+
+    async def _run(self, name, *args):
+        # There is one mouse and keyboard, so operations must not interleave
+        async with self._lock:
+            return await asyncio.to_thread(getattr(self.driver, name), *args)
+
+    async def open(self):
+        await self._run('open')
+
+    async def draw_batch(self, operations):
+        await self._run('draw_batch', operations)
+
+    async def draw_rectangle(self, x1, y1, x2, y2):
+        await self._run('draw_rectangle', x1, y1, x2, y2)
+
+    async def add_text(self, text, x, y):
+        await self._run('add_text', text, x, y)
+
+
+def create_driver(backend=None):
+    """Create the driver named by backend or PAINT_BACKEND, win32 by default
+
+    Raises RuntimeError if the win32 backend is chosen off Windows.
+    """
+    backend = backend or os.getenv('PAINT_BACKEND') or 'win32'
+    if backend == 'win32':
+        if sys.platform != 'win32':
+            raise RuntimeError(f"The win32 Paint backend needs Windows, not {sys.platform}; "
+                               "set PAINT_BACKEND=mock or headless to simulate Paint")
+        return Win32PaintDriver()
+    if backend == 'mock':
+        return MockPaintDriver()
+    if backend == 'headless':
+        return HeadlessPaintDriver()
+    raise ValueError(f"Unknown PAINT_BACKEND: {backend}")
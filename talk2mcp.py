@@ -1,285 +1,394 @@
 import os
 from dotenv import load_dotenv
-from mcp import ClientSession, StdioServerParameters, types
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
+from mcp_pool import MCPSessionPool
+from tool_catalog import ToolCatalog
+from llm_backends import create_backend
+from agent_context import AgentContext, DEFAULT_MAX_CHARS
+from call_plan import parse_plan, run_plan
+from tool_args import ToolIndex
+from mcp_logging import setup_logging
+from agent_replay import Recorder, RecordingBackend, RecordingPool, Recording, current_session
+import argparse
 import asyncio
-import google.generativeai as genai
-from concurrent.futures import TimeoutError
-from functools import partial
+import logging
+import time
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Access your API key and initialize Gemini client correctly
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY not found in environment variables")
-
-# Configure the model
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-2.0-flash')
+logger = logging.getLogger(__name__)
 
 max_iterations = 3
-last_response = None
-iteration = 0
-iteration_response = []
 
-async def generate_with_timeout(prompt, timeout=10):
+# Rendered system prompt from the previous run, reused while the tools are unchanged
+CATALOG_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tool_catalog.json")
+# Bump when build_system_prompt changes so cached prompts are re-rendered
+PROMPT_VERSION = 3
+
+# Phases timed in each conversation, in seconds per occurrence
+PHASES = ('prompt', 'llm', 'parse', 'tool_call')
+
+# Predefined query for demonstration
+DEFAULT_QUERY = """Open Paint, draw a rectangle from (100,100) to (400,400), and add the text 'Hello World' inside it."""
+
+async def generate_with_timeout(llm, prompt, timeout=10):
     """Generate content with a timeout"""
-    print("Starting LLM generation...")
+    logger.debug("Starting LLM generation...")
     try:
-        # Convert the synchronous generate_content call to run in a thread
-        loop = asyncio.get_event_loop()
-        response = await asyncio.wait_for(
-            loop.run_in_executor(
-                None, 
-                lambda: model.generate_content(prompt)
-            ),
-            timeout=timeout
-        )
-        print("LLM generation completed")
+        # The backend awaits the request natively and cancels it on timeout
+        response = await llm.generate(prompt, timeout=timeout)
+        logger.debug("LLM generation completed")
         return response
-    except TimeoutError:
-        print("LLM generation timed out!")
+    except asyncio.TimeoutError:
+        logger.warning("LLM generation timed out!")
         raise
     except Exception as e:
-        print(f"Error in LLM generation: {e}")
+        logger.error("Error in LLM generation: %s", e)
         raise
 
-def reset_state():
-    """Reset all global variables to their initial state"""
-    global last_response, iteration, iteration_response
-    last_response = None
-    iteration = 0
-    iteration_response = []
-
-async def main():
-    """Main execution function"""
-    global iteration, last_response
-    reset_state()  # Reset at the start of main
-    
-    print("Starting main execution...")
-    print("Establishing connection to MCP server...")
-    
-    # Create a session with the MCP server using stdio_client
-    server_params = StdioServerParameters(
+def server_parameters():
+    """Parameters for spawning the example2.py MCP server over stdio"""
+    return StdioServerParameters(
         command="python",
         args=["example2.py"],
         cwd=os.path.dirname(os.path.abspath(__file__))
     )
 
-    async with stdio_client(server_params) as (read, write):
-        print("Connection established, creating session...")
-        async with ClientSession(read, write) as session:
-            print("Session created, initializing...")
-            await session.initialize()
-            
-            # Get the list of available tools
-            print("Requesting tool list...")
-            tools_result = await session.list_tools()
-            tools = tools_result.tools
-            print(f"Successfully retrieved {len(tools)} tools")
-            
-            # Create a system prompt that describes the available tools
-            print("Creating system prompt...")
-            print(f"Number of tools: {len(tools)}")
-            
-            tools_description = []
-            for i, tool in enumerate(tools):
-                try:
-                    # Get tool properties
-                    params = tool.inputSchema
-                    desc = getattr(tool, 'description', 'No description available')
-                    name = getattr(tool, 'name', f'tool_{i}')
-                    
-                    # Format the input schema in a more readable way
-                    if 'properties' in params:
-                        param_details = []
-                        for param_name, param_info in params['properties'].items():
-                            param_type = param_info.get('type', 'unknown')
-                            param_details.append(f"{param_name}: {param_type}")
-                        params_str = ', '.join(param_details)
-                    else:
-                        params_str = 'no parameters'
-
-                    tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
-                    tools_description.append(tool_desc)
-                    print(f"Added description for tool: {tool_desc}")
-                except Exception as e:
-                    print(f"Error processing tool {i}: {e}")
-                    tools_description.append(f"{i+1}. Error processing tool")
-            
-            tools_description = "\n".join(tools_description)
-            print("Successfully created tools description")
+def build_system_prompt(tools):
+    """Create a system prompt that describes the available tools"""
+    logger.debug("Creating system prompt...")
+    logger.debug("Number of tools: %d", len(tools))
+    
+    tools_description = []
+    for i, tool in enumerate(tools):
+        try:
+            # Get tool properties
+            params = tool.inputSchema
+            desc = getattr(tool, 'description', 'No description available')
+            name = getattr(tool, 'name', f'tool_{i}')
             
-            system_prompt = f"""You are a math agent solving problems in iterations. You have access to various mathematical tools.
+            # Format the input schema in a more readable way
+            if 'properties' in params:
+                param_details = []
+                for param_name, param_info in params['properties'].items():
+                    param_type = param_info.get('type', 'unknown')
+                    param_details.append(f"{param_name}: {param_type}")
+                params_str = ', '.join(param_details)
+            else:
+                params_str = 'no parameters'
+
+            tool_desc = f"{i+1}. {name}({params_str}) - {desc}"
+            tools_description.append(tool_desc)
+            logger.debug("Added description for tool: %s", tool_desc)
+        except Exception as e:
+            logger.warning("Error processing tool %d: %s", i, e)
+            tools_description.append(f"{i+1}. Error processing tool")
+    
+    tools_description = "\n".join(tools_description)
+    logger.debug("Successfully created tools description")
+    
+    system_prompt = f"""You are a math agent solving problems in iterations. You have access to various mathematical tools.
 
 Available tools:
 {tools_description}
 
-You must respond with EXACTLY ONE line in one of these formats (no additional text):
-1. For function calls:
+You must respond in one of these formats (no additional text):
+1. For function calls, one or more lines of:
    FUNCTION_CALL: function_name|param1|param2|...
-   
-2. For final answers:
+   Calls you list together run at the same time. To use the result of one
+   call in another, name it and refer to it with $name:
+   FUNCTION_CALL: a=add|2|3
+   FUNCTION_CALL: multiply|$a|4
+   To run a call only after another one finished, end it with @after name:
+   FUNCTION_CALL: rect=draw_rectangle|100|100|400|400 @after paint
+
+2. For final answers, a single line:
    FINAL_ANSWER: [number]
 
 Important:
 - When a function returns multiple values, you need to process all of them
 - Only give FINAL_ANSWER when you have completed all necessary calculations
 - Do not repeat function calls with the same parameters
+- List independent calls together instead of one per response
 - For Paint operations, follow this sequence:
   1. First call open_paint to open the application
-  2. Wait for Paint to open (about 2 seconds)
-  3. Then call draw_rectangle with coordinates (x1,y1,x2,y2)
-  4. Wait for the rectangle to be drawn (about 1 second)
-  5. Finally call add_text_in_paint with the text to display
+  2. Then call draw_rectangle with coordinates (x1,y1,x2,y2)
+  3. Finally call add_text_in_paint with the text to display
+  Each Paint call returns once its action is complete, so no waiting is needed
 - Note: The coordinates are relative to the Paint window's top-left corner
 - For single monitor setup, use coordinates within the visible area (e.g., 100,100 to 400,400)
 
 Examples:
 - FUNCTION_CALL: add|5|3
 - FUNCTION_CALL: strings_to_chars_to_int|INDIA
-- FUNCTION_CALL: open_paint
-- FUNCTION_CALL: draw_rectangle|100|100|400|400
-- FUNCTION_CALL: add_text_in_paint|Hello World
+- FUNCTION_CALL: paint=open_paint
+  FUNCTION_CALL: rect=draw_rectangle|100|100|400|400 @after paint
+  FUNCTION_CALL: add_text_in_paint|Hello World @after rect
 - FINAL_ANSWER: [42]
 
 DO NOT include any explanations or additional text.
-Your entire response should be a single line starting with either FUNCTION_CALL: or FINAL_ANSWER:"""
+Every line of your response must start with either FUNCTION_CALL: or FINAL_ANSWER:"""
+    return system_prompt
+
+_tool_index = None
+
+def tool_index(tools):
+    """Name index and compiled argument converters for tools, built once per tool list"""
+    global _tool_index
+    if _tool_index is None or _tool_index.tools is not tools:
+        _tool_index = ToolIndex(tools)
+    return _tool_index
+
+class Conversation:
+    """One query's iteration loop, sharing the MCP sessions of a pool
+
+    Each conversation keeps its own iteration state, so any number of them
+    can run at the same time.
+    """
+
+    def __init__(self, pool, llm, system_prompt, query, max_iterations=max_iterations,
+                 context_chars=DEFAULT_MAX_CHARS):
+        self.pool = pool
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.query = query
+        self.max_iterations = max_iterations
+        self.iteration = 0
+        self.context = AgentContext(query, max_chars=context_chars)
+        self.final_answer = None
+        self.timings = {phase: [] for phase in PHASES}
+
+    def timed(self, phase, started):
+        self.timings[phase].append(time.perf_counter() - started)
 
-            # Predefined query for demonstration
-            query = """Open Paint, draw a rectangle from (100,100) to (400,400), and add the text 'Hello World' inside it."""
-            print("Starting iteration loop...")
+    async def run(self):
+        """Iterate until the LLM gives a final answer or max_iterations is reached"""
+        logger.debug("Starting iteration loop...")
+        prompt_prefix = f"{self.system_prompt}\n\nQuery: "
+        while self.iteration < self.max_iterations:
+            logger.debug("--- Iteration %d ---", self.iteration + 1)
             
-            while iteration < max_iterations:
-                print(f"\n--- Iteration {iteration + 1} ---")
+            # Prepare the prompt for the LLM
+            logger.debug("Preparing to generate LLM response...")
+            try:
+                # Generate LLM response; the context keeps the tool history
+                # within its budget, so the prompt does not grow every step
+                started = time.perf_counter()
+                prompt = prompt_prefix + self.context.render()
+                self.timed('prompt', started)
+                started = time.perf_counter()
+                response = await generate_with_timeout(self.llm, prompt)
+                self.timed('llm', started)
+                response_text = response.text.strip()
+                logger.info("LLM Response: %s", response_text)
                 
-                # Handle query based on iteration state
-                if last_response is None:
-                    current_query = query
-                else:
-                    current_query = current_query + "\n\n" + " ".join(iteration_response)
-                    current_query = current_query + "  What should I do next?"
-                
-                # Prepare the prompt for the LLM
-                print("Preparing to generate LLM response...")
+                # One response may carry several FUNCTION_CALL lines
+                started = time.perf_counter()
                 try:
-                    # Generate LLM response
-                    prompt = f"{system_prompt}\n\nQuery: {current_query}"
-                    try:
-                        response = await generate_with_timeout(prompt)
-                        response_text = response.text.strip()
-                        print(f"LLM Response: {response_text}")
-                        
-                        # Find the FUNCTION_CALL line in the response
-                        for line in response_text.split('\n'):
-                            line = line.strip()
-                            if line.startswith("FUNCTION_CALL:"):
-                                response_text = line
-                                break
-                        
-                        if response_text.startswith("FUNCTION_CALL:"):
-                            _, function_info = response_text.split(":", 1)
-                            parts = [p.strip() for p in function_info.split("|")]
-                            func_name, params = parts[0], parts[1:]
-                            
-                            print(f"\nDEBUG: Raw function info: {function_info}")
-                            print(f"DEBUG: Split parts: {parts}")
-                            print(f"DEBUG: Function name: {func_name}")
-                            print(f"DEBUG: Raw parameters: {params}")
-                            
-                            # Find the matching tool to get its input schema
-                            tool = next((t for t in tools if t.name == func_name), None)
-                            if not tool:
-                                print(f"DEBUG: Available tools: {[t.name for t in tools]}")
-                                raise ValueError(f"Unknown tool: {func_name}")
-
-                            print(f"DEBUG: Found tool: {tool.name}")
-                            print(f"DEBUG: Tool schema: {tool.inputSchema}")
-
-                            # Prepare arguments according to the tool's input schema
-                            arguments = {}
-                            schema_properties = tool.inputSchema.get('properties', {})
-                            print(f"DEBUG: Schema properties: {schema_properties}")
-
-                            for param_name, param_info in schema_properties.items():
-                                if not params:  # Check if we have enough parameters
-                                    raise ValueError(f"Not enough parameters provided for {func_name}")
-                                    
-                                value = params.pop(0)  # Get and remove the first parameter
-                                param_type = param_info.get('type', 'string')
-                                
-                                print(f"DEBUG: Converting parameter {param_name} with value {value} to type {param_type}")
-                                
-                                # Convert the value to the correct type based on the schema
-                                if param_type == 'integer':
-                                    arguments[param_name] = int(value)
-                                elif param_type == 'number':
-                                    arguments[param_name] = float(value)
-                                elif param_type == 'array':
-                                    # Handle array input
-                                    if isinstance(value, str):
-                                        value = value.strip('[]').split(',')
-                                    arguments[param_name] = [int(x.strip()) for x in value]
-                                else:
-                                    arguments[param_name] = str(value)
-
-                            print(f"DEBUG: Final arguments: {arguments}")
-                            print(f"DEBUG: Calling tool {func_name}")
-                            
-                            # Add delay for Paint operations
-                            if func_name == 'open_paint':
-                                print("Waiting for Paint to open...")
-                                await asyncio.sleep(2)  # Wait for Paint to open
-                            elif func_name == 'draw_rectangle':
-                                print("Waiting for rectangle to be drawn...")
-                                await asyncio.sleep(1)  # Wait for rectangle to be drawn
-                            
-                            result = await session.call_tool(func_name, arguments=arguments)
-                            print(f"DEBUG: Raw result: {result}")
-                            
-                            # Get the full result content
-                            if hasattr(result, 'content'):
-                                print(f"DEBUG: Result has content attribute")
-                                # Handle multiple content items
-                                if isinstance(result.content, list):
-                                    iteration_result = [
-                                        item.text if hasattr(item, 'text') else str(item)
-                                        for item in result.content
-                                    ]
-                                else:
-                                    iteration_result = str(result.content)
-                            else:
-                                print(f"DEBUG: Result has no content attribute")
-                                iteration_result = str(result)
-                                
-                            print(f"DEBUG: Final iteration result: {iteration_result}")
-                            
-                            # Format the response based on result type
-                            if isinstance(iteration_result, list):
-                                iteration_response = [str(x) for x in iteration_result]
-                            else:
-                                iteration_response = [str(iteration_result)]
-                                
-                            last_response = iteration_result
-                            print(f"Tool execution result: {iteration_result}")
-                            
-                        elif response_text.startswith("FINAL_ANSWER:"):
-                            print(f"Final answer: {response_text}")
-                            break
-                            
-                    except Exception as e:
-                        print(f"Failed to get LLM response: {e}")
-                        continue
-                        
-                except Exception as e:
-                    print(f"Error in main loop: {e}")
-                    continue
-                    
-                iteration += 1
+                    calls = parse_plan(response_text)
+                except ValueError as e:
+                    # Show the LLM why its calls were rejected in the next prompt
+                    self.context.add_step(response_text, f"Error: {e}")
+                    raise
+                self.timed('parse', started)
+                if calls:
+                    await self.run_calls(calls)
+                elif response_text.startswith("FINAL_ANSWER:"):
+                    logger.info("Final answer: %s", response_text)
+                    self.final_answer = response_text
+                    break
+            except Exception as e:
+                # A failed step still uses up an iteration so the loop always ends
+                logger.warning("Error in iteration %d: %s", self.iteration + 1, e)
+                
+            self.iteration += 1
+        return self.final_answer
+
+    async def run_calls(self, calls):
+        """Run the calls of one response, independent ones concurrently"""
+        logger.debug("Running %d function call(s)", len(calls))
+        await run_plan(calls, self.call_function)
+        # All results go back to the LLM together in the next prompt
+        for call in calls:
+            result = call.result if call.error is None else f"Error: {call.error}"
+            self.context.add_step(f"{call.id}={call.text}", result)
+            logger.info("%s: %s -> %s", call.id, call.text, result)
+
+    async def call_function(self, func_name, params):
+        """Call one tool with its string parameters and return the result text"""
+        await self.pool.ready()
+        started = time.perf_counter()
+        arguments = tool_index(self.pool.tools).arguments(func_name, params)
+        self.timed('parse', started)
+
+        started = time.perf_counter()
+        result = await self.pool.call_tool(func_name, arguments=arguments)
+        self.timed('tool_call', started)
+
+        # Get the full result content
+        if hasattr(result, 'content'):
+            # Handle multiple content items
+            if isinstance(result.content, list):
+                iteration_result = [
+                    item.text if hasattr(item, 'text') else str(item)
+                    for item in result.content
+                ]
+            else:
+                iteration_result = str(result.content)
+        else:
+            iteration_result = str(result)
+
+        # Format the response based on result type
+        if isinstance(iteration_result, list):
+            iteration_response = [str(x) for x in iteration_result]
+        else:
+            iteration_response = [str(iteration_result)]
+            
+        logger.debug("Tool execution result: %s", iteration_result)
+        if getattr(result, 'isError', False):
+            # Fail the call so run_plan skips the calls that use its result
+            raise RuntimeError(" ".join(iteration_response))
+        return " ".join(iteration_response)
+
+async def run_queries(pool, llm, catalog, queries, concurrency=4, context_chars=DEFAULT_MAX_CHARS):
+    """Run queries concurrently over the pool's sessions and report timings"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index, query):
+        async with semaphore:
+            # Recording and replay tell conversations apart by their index
+            current_session.set(str(index))
+            started = time.perf_counter()
+            answer, error = None, None
+            conversation = Conversation(
+                pool, llm, catalog.system_prompt, query, context_chars=context_chars
+            )
+            try:
+                answer = await conversation.run()
+            except Exception as e:
+                error = str(e)
+            return {
+                'query': query,
+                'answer': answer,
+                'error': error,
+                'latency': time.perf_counter() - started,
+                'timings': conversation.timings,
+            }
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_one(i, query) for i, query in enumerate(queries)))
+    print_report(results, time.perf_counter() - started, concurrency)
+    return results
+
+async def refresh_catalog(pool, catalog):
+    """Re-render the cached system prompt if the server's tools changed"""
+    try:
+        await pool.ready()
+    except Exception as e:
+        logger.error("Failed to connect to MCP server: %s", e)
+        return
+    logger.info("Connection established, retrieved %d tools", len(pool.tools))
+    tool_index(pool.tools)
+    if catalog.update(pool.tools):
+        logger.info("Server tools changed, rebuilt the system prompt")
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def print_report(results, elapsed, concurrency):
+    """Print per-query latency and overall throughput"""
+    print("\n--- Report ---")
+    for i, result in enumerate(results, 1):
+        outcome = result['answer'] or result['error'] or 'no final answer'
+        print(f"{i:>4}. {result['latency']:7.2f}s  {outcome}  | {result['query'][:60]}")
+
+    latencies = sorted(result['latency'] for result in results)
+    answered = sum(1 for result in results if result['answer'])
+    print(f"\nQueries: {len(results)} (answered {answered}), concurrency {concurrency}")
+    print(f"Latency: mean {sum(latencies) / max(len(latencies), 1):.2f}s, "
+          f"p50 {percentile(latencies, 0.50):.2f}s, p95 {percentile(latencies, 0.95):.2f}s, "
+          f"max {latencies[-1] if latencies else 0:.2f}s")
+    print(f"Throughput: {len(results) / elapsed:.2f} queries/s over {elapsed:.2f}s")
+    for phase in PHASES:
+        samples = sorted(t for result in results for t in result['timings'][phase])
+        if samples:
+            print(f"  {phase:<9} n={len(samples):<4} mean {sum(samples) / len(samples) * 1000:8.2f}ms, "
+                  f"p95 {percentile(samples, 0.95) * 1000:8.2f}ms")
+
+def load_queries(path):
+    """Read one query per line, skipping blank lines and # comments"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run queries through the MCP math agent")
+    parser.add_argument('--queries', help="file with one query per line (default: the demo query)")
+    parser.add_argument('--concurrency', type=int, default=4, help="queries running at the same time")
+    parser.add_argument('--sessions', type=int, default=1, help="warm MCP server sessions to share")
+    parser.add_argument('--llm', choices=['gemini', 'fake'], default='gemini', help="LLM backend")
+    parser.add_argument('--max-in-flight', type=int, default=8, help="LLM requests in flight at once")
+    parser.add_argument('--context-chars', type=int, default=DEFAULT_MAX_CHARS,
+                        help="budget for the query and tool history in each prompt")
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument('--record', metavar='PATH',
+                        help="save LLM responses and tool results to this JSONL file")
+    replay.add_argument('--replay', metavar='PATH',
+                        help="rerun a recording's queries without the LLM or the server")
+    parser.add_argument('--replay-speed', type=float, default=0.0,
+                        help="replay the recorded latencies scaled by this factor (0: no waiting)")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    """Main execution function"""
+    args = parse_args(argv)
+    setup_logging()
+    queries = load_queries(args.queries) if args.queries else [DEFAULT_QUERY]
+    recorder = None
+    if args.replay:
+        recording = Recording.load(args.replay)
+        queries = list(recording.queries.values())
+        pool, llm = recording.replay(args.replay_speed)
+        logger.info("Replaying %d queries from %s", len(queries), args.replay)
+    else:
+        llm = create_backend(args.llm, max_in_flight=args.max_in_flight)
+        # Keep warm server sessions for the whole run instead of spawning one per query
+        pool = MCPSessionPool(server_parameters(), size=args.sessions)
+        if args.record:
+            recorder = Recorder(args.record)
+            for i, query in enumerate(queries):
+                recorder.session(str(i), query)
+            llm, pool = RecordingBackend(llm, recorder), RecordingPool(pool, recorder)
+
+    logger.debug("Starting main execution...")
+    logger.info("Establishing connection to MCP server...")
+    opening = pool.start_soon()
+    catalog = ToolCatalog(CATALOG_CACHE_PATH, build_system_prompt, PROMPT_VERSION)
+    refresh = None
+    try:
+        if catalog.system_prompt is None:
+            await opening
+            logger.info("Connection established, retrieved %d tools", len(pool.tools))
+            tool_index(pool.tools)
+            catalog.update(pool.tools)
+        else:
+            # Warm start: the first LLM calls use the cached prompt while the
+            # server starts; it is checked against the live tools once up
+            logger.info("Using cached system prompt while the server starts...")
+            refresh = asyncio.create_task(refresh_catalog(pool, catalog))
+        await run_queries(pool, llm, catalog, queries, args.concurrency, args.context_chars)
+    finally:
+        if refresh is not None:
+            refresh.cancel()
+        await pool.close()
+        if recorder is not None:
+            recorder.close()
 
     print("\nSession closed. Goodbye!")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
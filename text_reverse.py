@@ -0,0 +1,147 @@
+"""Text reversal helpers shared by the MCP tools and the HTTP bridge."""
+import os
+import re
+import unicodedata
+
+MIN_CHUNK_BYTES = 4  # Longest UTF-8 sequence
+
+
+def iter_reversed_utf8(file, chunk_size=64 * 1024):
+    """Yield the UTF-8 text stored in file reversed, one encoded chunk at a time
+
+    The file is read backwards in pieces of at most chunk_size bytes. Each
+    piece is moved forward past any UTF-8 continuation bytes so that no
+    code point is ever split, which keeps the output identical to
+    text[::-1] while memory stays proportional to chunk_size.
+    """
+    chunk_size = max(chunk_size, MIN_CHUNK_BYTES)
+    end = file.seek(0, os.SEEK_END)
+    while end > 0:
+        start = max(0, end - chunk_size)
+        file.seek(start)
+        data = file.read(end - start)
+
+        skip = 0
+        if start:
+            while skip < MIN_CHUNK_BYTES - 1 and data[skip] & 0xC0 == 0x80:
+                skip += 1
+        yield data[skip:].decode('utf-8', 'replace')[::-1].encode('utf-8')
+        end = start + skip
+
+
+# Grapheme cluster rules from UAX #29, as far as they matter for keeping
+# user-perceived characters together when a string is reversed. Prepend
+# characters are not handled.
+_REGIONAL_INDICATOR = ((0x1F1E6, 0x1F1FF),)
+_HANGUL_L = ((0x1100, 0x115F), (0xA960, 0xA97C))
+_HANGUL_V = ((0x1160, 0x11A7), (0xD7B0, 0xD7C6))
+_HANGUL_T = ((0x11A8, 0x11FF), (0xD7CB, 0xD7FB))
+_HANGUL_LV = tuple((cp, cp) for cp in range(0xAC00, 0xD7A4, 28))
+_HANGUL_LVT = tuple((cp + 1, cp + 27) for cp in range(0xAC00, 0xD7A4, 28))
+_EXTRA_EXTEND = ((0x200C, 0x200C), (0x1F3FB, 0x1F3FF), (0xE0020, 0xE007F))
+_PICTOGRAPHIC = (
+    (0x00A9, 0x00A9), (0x00AE, 0x00AE), (0x203C, 0x203C), (0x2049, 0x2049),
+    (0x2122, 0x2122), (0x2139, 0x2139), (0x2194, 0x2199), (0x21A9, 0x21AA),
+    (0x231A, 0x231B), (0x2328, 0x2328), (0x23CF, 0x23CF), (0x23E9, 0x23F3),
+    (0x23F8, 0x23FA), (0x24C2, 0x24C2), (0x25AA, 0x25AB), (0x25B6, 0x25B6),
+    (0x25C0, 0x25C0), (0x25FB, 0x25FE), (0x2600, 0x27BF), (0x2934, 0x2935),
+    (0x2B05, 0x2B07), (0x2B1B, 0x2B1C), (0x2B50, 0x2B50), (0x2B55, 0x2B55),
+    (0x3030, 0x3030), (0x303D, 0x303D), (0x3297, 0x3297), (0x3299, 0x3299),
+    (0x1F000, 0x1F1E5), (0x1F200, 0x1F3FA), (0x1F400, 0x1FAFF),
+    (0x1FC00, 0x1FFFD),
+)
+# Marks and format characters live in planes 0, 1 and 14 only
+_SCANNED_PLANES = (range(0x20000), range(0xE0000, 0xE1000))
+
+_patterns = None
+
+
+def _char_class(ranges):
+    """Render ranges as a regex matching one character from them
+
+    Astral ranges sit behind a lookahead: re checks ranges outside the BMP
+    one by one, which would otherwise dominate the cost for every character.
+    """
+    bmp = [r for r in ranges if r[0] < 0x10000]
+    astral = [r for r in ranges if r[0] >= 0x10000]
+    alternatives = [f'[{_render_ranges(bmp)}]'] if bmp else []
+    if astral:
+        alternatives.append(f'(?=[\\U00010000-\\U0010ffff])[{_render_ranges(astral)}]')
+    return f'(?:{"|".join(alternatives)})'
+
+
+def _render_ranges(ranges):
+    return ''.join(
+        f'\\U{low:08x}' if low == high else f'\\U{low:08x}-\\U{high:08x}'
+        for low, high in ranges
+    )
+
+
+def _category_ranges(categories, exclude=()):
+    ranges = []
+    for plane in _SCANNED_PLANES:
+        for cp in plane:
+            if unicodedata.category(chr(cp)) not in categories or cp in exclude:
+                continue
+            if ranges and ranges[-1][1] == cp - 1:
+                ranges[-1] = (ranges[-1][0], cp)
+            else:
+                ranges.append((cp, cp))
+    return ranges
+
+
+def _grapheme_patterns():
+    """Compile the cluster pattern and the may-join character pattern
+
+    Built on first use because it scans the Unicode tables once (~0.1 s).
+    """
+    global _patterns
+    if _patterns is None:
+        extra_extend = {cp for low, high in _EXTRA_EXTEND for cp in range(low, high + 1)}
+        control_ranges = _category_ranges(('Cc', 'Cf', 'Zl', 'Zp'), extra_extend | {0x200D})
+        extend_ranges = _category_ranges(('Mn', 'Me')) + list(_EXTRA_EXTEND)
+        mark_ranges = extend_ranges + _category_ranges(('Mc',)) + [(0x200D, 0x200D)]
+        hangul_ranges = list(_HANGUL_L + _HANGUL_V + _HANGUL_T)
+
+        control = _char_class(control_ranges + [(0x0A, 0x0A), (0x0D, 0x0D), (0xD800, 0xDFFF)])
+        extend = _char_class(extend_ranges)
+        marks = _char_class(mark_ranges)
+        ri = _char_class(_REGIONAL_INDICATOR)
+        l, v, t = (_char_class(r) for r in (_HANGUL_L, _HANGUL_V, _HANGUL_T))
+        lv, lvt = _char_class(_HANGUL_LV), _char_class(_HANGUL_LVT)
+        pict = _char_class(_PICTOGRAPHIC)
+
+        cluster = (
+            f'\\r\\n|{control}|(?:'
+            f'{l}*(?:{v}+|{lv}{v}*|{lvt}){t}*|{l}+|{t}+'
+            f'|{ri}{ri}'
+            f'|{pict}(?:{extend}*\\u200d{pict})*'
+            f'|(?!{control})[\\s\\S]'
+            f'){marks}*'
+        )
+        # One plain character class, so search() runs re's table lookup per
+        # character instead of trying alternatives at every position. Exact
+        # astral ranges would turn the table into a range scan, so every
+        # astral character counts as joining and takes the cluster path.
+        joining_bmp = [r for r in mark_ranges + hangul_ranges if r[0] < 0x10000]
+        joining = f'[{_render_ranges(joining_bmp)}\\U00010000-\\U0010ffff]'
+        _patterns = re.compile(cluster), re.compile(joining)
+    return _patterns
+
+
+def grapheme_clusters(text):
+    """Split text into extended grapheme clusters"""
+    return _grapheme_patterns()[0].findall(text)
+
+
+def reverse_graphemes(text):
+    """Reverse text while keeping extended grapheme clusters intact
+
+    Combining marks, emoji ZWJ sequences, flags, Hangul jamo and CRLF stay
+    in order. BMP text without any joining characters (ASCII, Cyrillic or
+    CJK prose, precomposed accents) clusters exactly like its code points,
+    so it takes a fast path and is simply sliced.
+    """
+    if '\r\n' not in text and (text.isascii() or _grapheme_patterns()[1].search(text) is None):
+        return text[::-1]
+    return ''.join(grapheme_clusters(text)[::-1])
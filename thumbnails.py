@@ -0,0 +1,228 @@
+"""Thumbnail pipeline for the create_thumbnail tools.
+
+- JPEG sources are decoded at reduced size with PIL's draft mode, so a
+  large photo is never fully decoded.
+- Thumbnails are encoded as real PNG or WebP into a per-thread buffer that
+  is reused between calls.
+- Sources of MMAP_THRESHOLD bytes or more are read through mmap rather
+  than copied into memory.
+- Encoded thumbnails are cached on disk, keyed by the source's path,
+  modification time and size, so an unchanged file is not decoded again.
+  The cache lives in a per-user directory (THUMBNAIL_CACHE_DIR, else the
+  user's cache directory) that only its owner can open, and the least
+  recently used files are evicted once it holds more than
+  CACHE_MAX_BYTES.
+
+thumbnail_directory() processes every image in a directory on a thread
+pool; PIL releases the GIL while decoding, resizing and encoding.
+"""
+import hashlib
+import io
+import logging
+import mmap
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+THUMBNAIL_SIZE = (100, 100)
+FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+MMAP_THRESHOLD = 1024 * 1024
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff'}
+MAX_BATCH = 256
+CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Eviction goes down to this fraction of the limit, so it does not run on
+# every write once the cache is full
+CACHE_LOW_WATER = 0.8
+WORKERS = min(8, (os.cpu_count() or 1) + 2)
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def user_cache_directory():
+    """This user's cache directory for thumbnails"""
+    if sys.platform == 'win32':
+        base = os.getenv('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    else:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'mcp-thumbnails')
+
+
+class ThumbnailCache:
+    """Encoded thumbnails on disk, invalidated when the source file changes
+
+    The directory is created with mode 0700 and not used at all if another
+    user owns it. Once the files add up to more than max_bytes, the least
+    recently used ones are deleted; a hit counts as a use.
+    """
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._usable = None
+        self._size = None
+
+    def _path(self, source, stat, size, format):
+        key = f'{os.path.abspath(source)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}|{format}'
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.{format}')
+
+    def _check_directory(self):
+        """Create the directory if needed; False if it is not safe to use"""
+        with self._lock:
+            if self._usable is None:
+                try:
+                    os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                    owner = os.stat(self.directory).st_uid
+                    self._usable = not hasattr(os, 'getuid') or owner == os.getuid()
+                    if not self._usable:
+                        logger.warning("Not caching thumbnails: %s belongs to another user", self.directory)
+                except OSError as e:
+                    logger.warning("Not caching thumbnails in %s: %s", self.directory, e)
+                    self._usable = False
+            return self._usable
+
+    def get(self, source, stat, size, format):
+        if not self._check_directory():
+            return None
+        path = self._path(source, stat, size, format)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Eviction goes by modification time
+            return data
+        except OSError:
+            return None
+
+    def put(self, source, stat, size, format, data):
+        if not self._check_directory():
+            return
+        path = self._path(source, stat, size, format)
+        # Write atomically so concurrent readers never see half a file
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not cache thumbnail for %s: %s", source, e)
+            return
+        with self._lock:
+            if self._size is None:
+                self._size = sum(file_size for _, file_size, _ in self._entries())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """(mtime, size, path) of every cached file"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.is_file():
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _evict(self):
+        """Delete the least recently used files down to CACHE_LOW_WATER of max_bytes"""
+        entries = sorted(self._entries())
+        self._size = sum(file_size for _, file_size, _ in entries)
+        target = self.max_bytes * CACHE_LOW_WATER
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except OSError:
+                pass
+
+
+default_cache = ThumbnailCache(os.getenv('THUMBNAIL_CACHE_DIR') or user_cache_directory())
+
+
+def _encode(img, format):
+    """Encode img into this thread's reusable buffer and return the bytes"""
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = io.BytesIO()
+    buffer.seek(0)
+    buffer.truncate()
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA', 'P') or (format == 'webp' and img.mode not in ('RGB', 'RGBA')):
+        img = img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+    img.save(buffer, FORMATS[format])
+    return buffer.getvalue()
+
+
+def _render(source, file_size, size, format):
+    with open(source, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if file_size >= MMAP_THRESHOLD else None
+        try:
+            with Image.open(mapped if mapped is not None else f) as img:
+                # JPEG: let the decoder scale down by up to 8x while decoding
+                img.draft('RGB', size)
+                img.thumbnail(size)
+                return _encode(img, format)
+        finally:
+            if mapped is not None:
+                mapped.close()
+
+
+def _check_format(format):
+    """Return format in lower case; raises ValueError if it is not in FORMATS"""
+    format = format.lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported thumbnail format {format!r}, expected one of {', '.join(FORMATS)}")
+    return format
+
+
+def make_thumbnail(source, size=THUMBNAIL_SIZE, format='png', cache=default_cache):
+    """Return the encoded thumbnail of the image at source, fitting in size"""
+    format = _check_format(format)
+    size = tuple(size)
+    stat = os.stat(source)
+    if cache is not None:
+        data = cache.get(source, stat, size, format)
+        if data is not None:
+            return data
+    data = _render(source, stat.st_size, size, format)
+    if cache is not None:
+        cache.put(source, stat, size, format, data)
+    return data
+
+
+def thumbnail_directory(directory, size=THUMBNAIL_SIZE, format='png', cache=default_cache,
+                        workers=WORKERS, limit=MAX_BATCH):
+    """Thumbnail every image in directory in parallel; returns [(name, bytes)]
+
+    Files that cannot be read as images are skipped. Raises ValueError for
+    an unsupported format before looking at any file.
+    """
+    format = _check_format(format)
+    names = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+    )[:limit]
+
+    def render(name):
+        try:
+            return name, make_thumbnail(os.path.join(directory, name), size, format, cache)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning("Skipping %s: %s", name, e)
+            return name, None
+
+    with ThreadPoolExecutor(workers) as pool:
+        return [(name, data) for name, data in pool.map(render, names) if data is not None]
@@ -0,0 +1,129 @@
+"""Convert the string parameters of a FUNCTION_CALL line into tool arguments.
+
+The LLM passes parameters as text (`add|5|3`), so they are converted with
+the tool's input schema. The schema is walked once per tool, when the tool
+list is indexed, and turned into a list of converters; a call then only
+applies one converter per parameter.
+"""
+import json
+
+_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def _to_bool(value):
+    try:
+        return _BOOLEANS[value.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Expected a boolean, got {value!r}")
+
+
+def _untyped(value):
+    """Untyped array items: int or float when the text is a number"""
+    if not isinstance(value, str):
+        return value
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _loads(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _compile(schema):
+    """Return a function converting a string (or parsed JSON) per schema"""
+    if 'anyOf' in schema:
+        # Optional[...] and unions: the first option that accepts the value
+        options = [_compile(option) for option in schema['anyOf'] if option.get('type') != 'null']
+
+        def convert_any(value):
+            if isinstance(value, str) and value.strip().lower() in ('none', 'null'):
+                return None
+            for option in options:
+                try:
+                    return option(value)
+                except (ValueError, TypeError):
+                    pass
+            raise ValueError(f"Cannot convert {value!r}")
+        return convert_any
+
+    param_type = schema.get('type', 'string')
+    if param_type == 'integer':
+        return lambda value: int(value) if isinstance(value, str) else int(float(value))
+    if param_type == 'number':
+        return float
+    if param_type == 'boolean':
+        return lambda value: _to_bool(value) if isinstance(value, str) else bool(value)
+    if param_type == 'object':
+        return _loads
+    if param_type == 'array':
+        item = _compile(schema['items']) if schema.get('items') else None
+
+        def convert_array(value):
+            if isinstance(value, str):
+                text = value.strip()
+                if text.startswith('['):
+                    # JSON syntax allows nested arrays: [[1, 2], [3, 4]]
+                    items = json.loads(text)
+                elif ',' in text:
+                    items = [x.strip() for x in text.split(',') if x.strip()]
+                else:
+                    # A $name reference to a tool returning several values
+                    # arrives as their texts joined by spaces
+                    items = text.split()
+            else:
+                items = value
+            return [(item or _untyped)(x) for x in items]
+        return convert_array
+    return lambda value: value if isinstance(value, str) else json.dumps(value)
+
+
+class ToolArguments:
+    """A tool and its compiled parameter converters"""
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.name = tool.name
+        schema = tool.inputSchema or {}
+        required = set(schema.get('required', ()))
+        self.params = []  # (name, convert, required, default)
+        for name, info in schema.get('properties', {}).items():
+            self.params.append((name, _compile(info), name in required or 'default' not in info, info.get('default')))
+
+    def coerce(self, values):
+        """Map positional string values onto the tool's arguments"""
+        if len(values) > len(self.params):
+            raise ValueError(f"{self.name} takes {len(self.params)} parameters, got {len(values)}")
+        arguments = {}
+        for i, (name, convert, required, default) in enumerate(self.params):
+            if i < len(values):
+                try:
+                    arguments[name] = convert(values[i])
+                except (ValueError, TypeError) as e:
+                    raise ValueError(f"Invalid value for {self.name}.{name}: {values[i]!r} ({e})")
+            elif required:
+                raise ValueError(f"Not enough parameters provided for {self.name}")
+            else:
+                arguments[name] = default
+        return arguments
+
+
+class ToolIndex:
+    """Tools by name, with their converters compiled once"""
+
+    def __init__(self, tools):
+        self.tools = tools
+        self._by_name = {tool.name: ToolArguments(tool) for tool in tools}
+
+    def get(self, name):
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise ValueError(f"Unknown tool: {name}")
+
+    def arguments(self, name, values):
+        """Resolve the tool and convert its parameters in one step"""
+        return self.get(name).coerce(values)
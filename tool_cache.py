@@ -0,0 +1,177 @@
+"""Opt-in result caching for deterministic MCP tools.
+
+Declare it when registering a pure tool, below the registration decorator:
+
+    @mcp.tool()
+    @memoize(maxsize=256, ttl=600)
+    def factorial(a: int) -> int:
+        ...
+
+Never use it on tools with side effects (open_paint, draw_rectangle, ...):
+a cache hit skips the call entirely. Reserve it for tools that cost far more
+than their arguments and result are large: each call hashes the arguments
+and a miss also sizes the result, so a tool that is linear in its input
+(reversing a string, mapping a list) gets slower, not faster.
+"""
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Every cache created by memoize, by tool name, for inspection
+_caches = {}
+
+
+class ToolCache:
+    """LRU cache bounded by entry count and approximate size in bytes"""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) on a hit and (False, None) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = _sizeof(key) + _sizeof(value)
+        if size > self.max_bytes:
+            return  # Would evict everything else; not worth caching
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'maxsize': self.maxsize,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+        }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+
+def memoize(maxsize=DEFAULT_MAXSIZE, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+    """Cache a pure tool's results by its arguments
+
+    Works for sync and async tools and keeps the signature FastMCP uses to
+    build the tool schema. The cache is available as the wrapper's .cache
+    attribute and through cache_stats().
+    """
+    def decorator(fn):
+        cache = ToolCache(maxsize, max_bytes, ttl)
+        _caches[fn.__name__] = cache
+        signature = inspect.signature(fn)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                key = _make_key(signature, args, kwargs)
+                if key is not None:
+                    found, value = cache.get(key)
+                    if found:
+                        return value
+                value = await fn(*args, **kwargs)
+                if key is not None:
+                    cache.put(key, value)
+                return value
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = _make_key(signature, args, kwargs)
+                if key is not None:
+                    found, value = cache.get(key)
+                    if found:
+                        return value
+                value = fn(*args, **kwargs)
+                if key is not None:
+                    cache.put(key, value)
+                return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Return hit/miss counters and sizes for every memoized tool"""
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def _make_key(signature, args, kwargs):
+    """Build a hashable key from the call arguments, or None if impossible
+
+    Arguments are bound to the signature first, so f(1), f(a=1) and, with a
+    default b, f(1, b=default) all share one entry.
+    """
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return None  # The call itself will raise
+    bound.apply_defaults()
+    try:
+        key = (_freeze(bound.args),
+               tuple(sorted((name, _freeze(value)) for name, value in bound.kwargs.items())))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_sizeof(key) + _sizeof(item) for key, item in value.items())
+    return size
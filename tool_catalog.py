@@ -0,0 +1,70 @@
+"""Rendered tool catalog (system prompt) cached across runs.
+
+Rendering walks every tool's input schema, so the result is stored on disk
+together with a digest of the tool list it was rendered from. It is only
+rendered again when the server reports a different tool list.
+"""
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def tools_digest(tools):
+    """Stable hash of the names, descriptions and input schemas of tools"""
+    listing = [[tool.name, tool.description, tool.inputSchema] for tool in tools]
+    encoded = json.dumps(listing, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ToolCatalog:
+    """System prompt rendered from a tool list, persisted at path
+
+    system_prompt is available straight away when a previous run left a
+    cache file, before the server has even been started. Bump version when
+    render changes, so prompts rendered by the old code are not reused.
+    """
+
+    def __init__(self, path, render, version=1):
+        self.path = path
+        self.render = render
+        self.version = version
+        self.digest = None
+        self.system_prompt = None
+        self._load()
+
+    def update(self, tools):
+        """Re-render the prompt if tools differ from the cached ones; True if it did"""
+        digest = tools_digest(tools)
+        if digest == self.digest:
+            return False
+        self.system_prompt = self.render(tools)
+        self.digest = digest
+        self._save()
+        return True
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version', 1) != self.version:
+                raise ValueError('stale prompt format')
+            self.digest, self.system_prompt = cached['digest'], cached['system_prompt']
+        except (OSError, ValueError, KeyError, TypeError):
+            self.digest = self.system_prompt = None
+
+    def _save(self):
+        # Write atomically so a concurrent run never reads half a file
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.version,
+                    'digest': self.digest,
+                    'system_prompt': self.system_prompt,
+                }, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save tool catalog cache: %s", e)
@@ -0,0 +1,116 @@
+"""Per-tool execution modes for sync tools on a FastMCP server.
+
+FastMCP calls a sync tool directly on the event loop, so one slow call holds
+up every other request, even though the server handles each request in its
+own task. Declare where a tool runs when registering it, below the
+registration decorator:
+
+    @mcp.tool()
+    @execution('thread')
+    def create_thumbnail(image_path: str) -> Image:
+        ...
+
+    inline   on the event loop (FastMCP's default; right for cheap tools)
+    thread   in a thread pool; for blocking I/O and code that releases the
+             GIL (PIL, hashlib, NumPy)
+    process  in a process pool; for pure-Python CPU-bound work. Arguments and
+             results must be picklable and the tool cannot take a Context.
+             The first call spawns a worker that imports the tool's module
+             (most of a second for a server module) and every call pickles
+             its arguments and result, so keep this for tools that take
+             well over that per call.
+
+The wrapped tool becomes a coroutine function, so concurrent requests to
+thread and process tools overlap instead of queueing.
+"""
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+MODES = ('inline', 'thread', 'process')
+
+THREAD_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+PROCESS_WORKERS = os.cpu_count() or 1
+
+# Workers are spawned, not forked: a stdio server has a thread blocked reading
+# stdin, and a forked child deadlocks closing the stdin it inherited
+PROCESS_CONTEXT = multiprocessing.get_context('spawn')
+
+# Functions by "module:qualname"; process workers run them by name, as the
+# tool objects themselves cannot be pickled once replaced by their wrappers
+_registry = {}
+_executors = {}
+
+
+def register(fn):
+    """Add fn to the registry and return the key workers find it under"""
+    # A script imported by spawned workers is named __mp_main__ there
+    module = '__main__' if fn.__module__ == '__mp_main__' else fn.__module__
+    key = f'{module}:{fn.__qualname__}'
+    _registry[key] = fn
+    return key
+
+
+def lookup(key):
+    """Find a registered function, importing its module in a fresh worker"""
+    fn = _registry.get(key)
+    if fn is None:
+        module = key.partition(':')[0]
+        importlib.import_module('__mp_main__' if module == '__main__' else module)
+        fn = _registry[key]
+    return fn
+
+
+def call_registered(key, args, kwargs):
+    return lookup(key)(*args, **kwargs)
+
+
+def get_executor(mode):
+    """The shared pool for 'thread' or 'process', created on first use"""
+    executor = _executors.get(mode)
+    if executor is None:
+        if mode == 'thread':
+            executor = ThreadPoolExecutor(THREAD_WORKERS, thread_name_prefix='tool')
+        elif mode == 'process':
+            executor = ProcessPoolExecutor(PROCESS_WORKERS, mp_context=PROCESS_CONTEXT)
+        else:
+            raise ValueError(f"No pool for execution mode {mode!r}")
+        _executors[mode] = executor
+    return executor
+
+
+def shutdown(wait=True):
+    """Stop the pools, e.g. when the server exits"""
+    for executor in _executors.values():
+        executor.shutdown(wait=wait, cancel_futures=True)
+    _executors.clear()
+
+
+def execution(mode):
+    """Run a sync tool inline, in the thread pool or in the process pool"""
+    if mode not in MODES:
+        raise ValueError(f"Execution mode must be one of {', '.join(MODES)}, not {mode!r}")
+
+    def decorator(fn):
+        if mode == 'inline':
+            return fn
+        if asyncio.iscoroutinefunction(fn):
+            raise TypeError(f"{fn.__name__} is already async; only sync tools can be offloaded")
+        key = register(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            if mode == 'thread':
+                call = functools.partial(fn, *args, **kwargs)
+                return await loop.run_in_executor(get_executor('thread'), call)
+            return await loop.run_in_executor(
+                get_executor('process'), call_registered, key, args, kwargs
+            )
+
+        wrapper.execution_mode = mode
+        return wrapper
+    return decorator
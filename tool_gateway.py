@@ -0,0 +1,78 @@
+"""Expose every tool registered on a FastMCP server through the HTTP bridge.
+
+The dispatch table is built once, when the tools are mounted: each tool gets
+its own exact-match route with the function, its argument validator and the
+async flag bound in advance, so a request costs one dict lookup plus the
+argument validation itself.
+"""
+from pydantic import ValidationError
+from pydantic_core import to_jsonable_python
+
+from bridge_codecs import JSON_TYPE, MSGPACK_TYPE
+from http_bridge import HTTPError, Response
+from tool_guard import LimitExceeded
+
+
+class ToolEntry:
+    """Everything needed to call one tool, resolved ahead of time"""
+
+    def __init__(self, tool, context=None):
+        self.name = tool.name
+        self.fn = tool.fn
+        self.is_async = tool.is_async
+        self.validate = tool.fn_metadata.arg_model.model_validate
+        self.extra_arguments = {tool.context_kwarg: context} if tool.context_kwarg else {}
+        self.info = {
+            'name': tool.name,
+            'description': tool.description,
+            'inputSchema': tool.parameters,
+        }
+
+    async def call(self, arguments):
+        try:
+            parsed = self.validate(arguments).model_dump_one_level()
+        except ValidationError as e:
+            details = e.errors(include_url=False, include_context=False, include_input=False)
+            raise HTTPError(400, f'Invalid arguments for {self.name}', details)
+        parsed.update(self.extra_arguments)
+        try:
+            if self.is_async:
+                return await self.fn(**parsed)
+            return self.fn(**parsed)
+        except LimitExceeded as e:
+            raise HTTPError(422, f'{self.name} exceeded a resource limit', e.to_dict())
+
+
+def build_dispatch_table(mcp):
+    """Map tool names to ToolEntry objects for every tool registered on mcp"""
+    context = mcp.get_context()
+    return {tool.name: ToolEntry(tool, context) for tool in mcp._tool_manager.list_tools()}
+
+
+def mount_tools(bridge, mcp, prefix='/tools'):
+    """Register POST <prefix>/<name> for every tool and GET <prefix> for the catalog
+
+    Call this once, after all tools have been registered on mcp.
+    """
+    table = build_dispatch_table(mcp)
+    catalog = Response.json({'tools': [entry.info for entry in table.values()]})
+
+    @bridge.route('GET', prefix)
+    async def list_tools(request):
+        return catalog
+
+    for entry in table.values():
+        bridge.route('POST', f'{prefix}/{entry.name}')(_make_handler(entry))
+    return table
+
+
+def _make_handler(entry):
+    async def call_tool(request):
+        # An empty body, with or without chunked encoding, means no arguments
+        arguments = await request.data() if await request.body() else {}
+        if not isinstance(arguments, dict):
+            raise HTTPError(400, 'Expected a JSON object of tool arguments')
+        result = await entry.call(arguments)
+        media_type = request.accepts(JSON_TYPE, MSGPACK_TYPE)
+        return Response.encoded({'result': to_jsonable_python(result, fallback=str)}, media_type)
+    return call_tool
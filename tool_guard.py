@@ -0,0 +1,239 @@
+"""Cost estimation and guarded execution for expensive tools.
+
+Tools such as factorial or power take unbounded integers from LLM output,
+and a single factorial(10**7) would pin the server's only thread. Declare
+such tools with a cost function estimating the size of the result in bits,
+below the registration decorator:
+
+    @mcp.tool()
+    @guarded(cost=factorial_bits)
+    def factorial(a: int) -> int:
+        ...
+
+Calls whose estimate exceeds the policy's limit are rejected before any work
+is done. Cheap calls run inline, and the rest run in a process pool whose
+workers are capped in CPU time and memory (RLIMIT_CPU and RLIMIT_AS, where
+the platform has them), so the event loop stays free. A worker stopped by
+the CPU limit breaks the pool for every call running on it, so those calls
+are rerun one at a time in a worker of their own, and only the one that
+hits the limit again fails. When a limit is hit, the tool raises
+LimitExceeded. Its message is a JSON object:
+
+    {"error": "result_too_large", "message": "...", "estimated_bits": ..., "limit_bits": ...}
+"""
+import asyncio
+import functools
+import inspect
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from mcp.server.fastmcp.exceptions import ToolError
+
+from tool_executor import PROCESS_CONTEXT, lookup, register
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: no rlimits, the pool still isolates the work
+
+# About 315,000 decimal digits; larger results are too slow to serialise
+MAX_RESULT_BITS = 1024 * 1024
+INLINE_BITS = 64 * 1024
+CPU_SECONDS = 10
+MEMORY_BYTES = 1024 * 1024 * 1024
+WORKERS = 2
+
+_LOG2_E = math.log2(math.e)
+_LOG2_PHI = math.log2((1 + 5 ** 0.5) / 2)
+
+
+class LimitExceeded(ToolError):
+    """A guarded call was refused or stopped by one of the policy's limits"""
+
+    def __init__(self, code, message, **details):
+        self.code = code
+        self.details = details
+        super().__init__(json.dumps({'error': code, 'message': message, **details}))
+
+    def to_dict(self):
+        return json.loads(str(self))
+
+
+# Cost estimates: approximate size of the result in bits, given the tool's
+# arguments positionally
+
+def factorial_bits(n):
+    """log2(n!) by Stirling's approximation"""
+    if n < 2:
+        return 1
+    return int(n * math.log2(n) - n * _LOG2_E + 0.5 * math.log2(2 * math.pi * n)) + 1
+
+
+def power_bits(a, b):
+    if b <= 0 or abs(a) < 2:
+        return 64
+    return int(b * math.log2(abs(a))) + 1
+
+
+def fibonacci_bits(n):
+    return int(max(n, 1) * _LOG2_PHI) + 1
+
+
+def fibonacci_list_bits(n):
+    """Total size of the first n Fibonacci numbers"""
+    return int(max(n, 1) ** 2 * _LOG2_PHI / 2) + n * 64
+
+
+class ExecutionPolicy:
+    """Limits applied to guarded calls and the process pool that runs them"""
+
+    def __init__(self, max_result_bits=MAX_RESULT_BITS, inline_bits=INLINE_BITS,
+                 cpu_seconds=CPU_SECONDS, memory_bytes=MEMORY_BYTES, workers=WORKERS):
+        self.max_result_bits = max_result_bits
+        self.inline_bits = inline_bits
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.workers = workers
+        self._executor = None
+        self._isolation_lock = None
+
+    async def run(self, key, fn, cost, args, kwargs):
+        try:
+            estimate = cost(*args) if cost is not None else None
+        except OverflowError:
+            # Arguments past float range, e.g. factorial(10**400), are far
+            # beyond any limit
+            raise LimitExceeded(
+                'result_too_large',
+                f"{fn.__name__} would produce a result too large to estimate",
+                limit_bits=self.max_result_bits,
+            )
+        if estimate is not None and estimate > self.max_result_bits:
+            raise LimitExceeded(
+                'result_too_large',
+                f"{fn.__name__} would produce a result of about {estimate} bits",
+                estimated_bits=estimate,
+                limit_bits=self.max_result_bits,
+            )
+        if estimate is not None and estimate <= self.inline_bits:
+            return fn(*args, **kwargs)
+
+        executor = self.executor()
+        try:
+            return await self._submit(executor, fn, key, args, kwargs)
+        except BrokenProcessPool:
+            # The kernel kills a worker that passes its CPU time limit, and
+            # every call in flight on the pool fails with it. Replace the
+            # pool, then rerun each of those calls alone to find which one
+            # hit the limit.
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+        return await self._run_isolated(fn, key, args, kwargs)
+
+    async def _submit(self, executor, fn, key, args, kwargs):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor, _call_guarded, key, args, kwargs, self.cpu_seconds
+            )
+        except MemoryError:
+            raise LimitExceeded(
+                'memory_limit',
+                f"{fn.__name__} ran out of memory",
+                limit_bytes=self.memory_bytes,
+            )
+
+    async def _run_isolated(self, fn, key, args, kwargs):
+        """Run a call from a broken pool again, alone in a one-worker pool
+
+        The calls are rerun one at a time, so a call that breaks this pool
+        is the one that hit the CPU limit.
+        """
+        if self._isolation_lock is None:
+            self._isolation_lock = asyncio.Lock()
+        async with self._isolation_lock:
+            executor = self._new_executor(1)
+            try:
+                return await self._submit(executor, fn, key, args, kwargs)
+            except BrokenProcessPool:
+                raise LimitExceeded(
+                    'cpu_limit',
+                    f"{fn.__name__} was stopped by the CPU time limit",
+                    limit_seconds=self.cpu_seconds,
+                )
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = self._new_executor(self.workers)
+        return self._executor
+
+    def _new_executor(self, workers):
+        return ProcessPoolExecutor(
+            workers, mp_context=PROCESS_CONTEXT,
+            initializer=_limit_worker, initargs=(self.memory_bytes,)
+        )
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+default_policy = ExecutionPolicy()
+
+
+def guarded(cost=None, policy=None):
+    """Run a sync tool under an ExecutionPolicy (default_policy if not given)
+
+    cost takes the tool's arguments and returns the estimated result size in
+    bits; without it every call goes to the process pool. The wrapper is a
+    coroutine function with the tool's signature.
+    """
+    def decorator(fn):
+        key = register(fn)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # FastMCP passes keyword arguments; run them positionally
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return await (policy or default_policy).run(key, fn, cost, bound.args, {})
+
+        return wrapper
+    return decorator
+
+
+def _limit_worker(memory_bytes):
+    if resource is None:
+        return
+    # RLIMIT_AS covers the whole address space, including what this freshly
+    # spawned interpreter has mapped already, so the budget is added to that
+    try:
+        with open('/proc/self/statm') as f:
+            memory_bytes += int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard == resource.RLIM_INFINITY or memory_bytes < hard:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def _call_guarded(key, args, kwargs, cpu_seconds):
+    """Worker side: look the function up by name and run it under a CPU limit"""
+    fn = lookup(key)
+    if resource is not None:
+        # RLIMIT_CPU counts the worker's whole lifetime, so the soft limit is
+        # moved to cpu_seconds past what it has used so far
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    return fn(*args, **kwargs)
@@ -0,0 +1,153 @@
+"""Serve a server's tool list from a manifest and build each tool on first call.
+
+Registering a FastMCP tool builds a pydantic model of its arguments and
+renders its JSON schema, which is most of a calculator server's start-up
+once the mcp package itself is imported. A ToolManifest saves the rendered
+metadata of every tool on the first start. Later starts of the same source
+register the tools from it, so initialize + list_tools are answered at
+once. A tool's argument model is built when the tool is first called.
+Create the manifest right after the server; tools are then declared with
+@mcp.tool() as usual:
+
+    tools = ToolManifest(mcp, MANIFEST_PATH, sources=[__file__])
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        ...
+
+    tools.save()  # after the last tool
+
+The manifest is keyed by a hash of the sources and the mcp version, so
+editing a tool's signature or docstring re-renders it on the next start.
+Whether a tool is async is read from the function itself at registration,
+since wrappers from other modules (tool_guard, tool_executor, ...) decide it.
+"""
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import logging
+import os
+
+from mcp.server.fastmcp.tools import Tool
+from mcp.types import ToolAnnotations
+
+# Bump when the manifest layout changes
+MANIFEST_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(sources):
+    """Hash of the given source files and the installed mcp version"""
+    digest = hashlib.sha256(f'{MANIFEST_VERSION}|{importlib.metadata.version("mcp")}'.encode())
+    for source in sources:
+        with open(source, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class LazyTool(Tool):
+    """A tool registered from manifest metadata
+
+    fn_metadata and context_kwarg are left unset and filled in from the
+    function the first time either is needed, i.e. on the first call.
+    """
+
+    options: dict = {}
+    manifest_output_schema: dict | None = None
+
+    @classmethod
+    def from_manifest(cls, fn, entry, options):
+        annotations = entry.get('annotations')
+        return cls.model_construct(
+            fn=fn,
+            name=entry['name'],
+            title=entry.get('title'),
+            description=entry.get('description') or '',
+            parameters=entry['inputSchema'],
+            is_async=inspect.iscoroutinefunction(fn),
+            annotations=ToolAnnotations.model_validate(annotations) if annotations else None,
+            meta=entry.get('_meta'),
+            options=options,
+            manifest_output_schema=entry.get('outputSchema'),
+        )
+
+    @property
+    def built(self):
+        return 'fn_metadata' in self.__dict__
+
+    @property
+    def output_schema(self):
+        if self.built:
+            return self.fn_metadata.output_schema
+        return self.manifest_output_schema
+
+    def __getattr__(self, name):
+        if name in ('fn_metadata', 'context_kwarg') and not self.built:
+            tool = Tool.from_function(self.fn, name=self.name, **self.options)
+            self.fn_metadata = tool.fn_metadata
+            self.context_kwarg = tool.context_kwarg
+            return getattr(self, name)
+        return super().__getattr__(name)
+
+
+class ToolManifest:
+    """Registers mcp's tools from the saved manifest when it is current"""
+
+    def __init__(self, mcp, path, sources):
+        self.mcp = mcp
+        self.path = path
+        self.fingerprint = fingerprint(sources)
+        self.entries = self._load()
+        self.lazy = 0
+        # FastMCP.add_tool, and so @mcp.tool(), registers through the manager
+        manager = mcp._tool_manager
+        self._add_tool = manager.add_tool
+        manager.add_tool = self._register
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('fingerprint') != self.fingerprint:
+            return {}
+        return {entry['name']: entry for entry in manifest.get('tools', [])}
+
+    def _register(self, fn, name=None, **options):
+        entry = self.entries.get(name or fn.__name__)
+        if entry is None:
+            return self._add_tool(fn, name=name, **options)
+        tool = LazyTool.from_manifest(fn, entry, options)
+        self.lazy += 1
+        return self.mcp._tool_manager._tools.setdefault(tool.name, tool)
+
+    def save(self):
+        """Write the manifest unless every tool was registered from it"""
+        tools = self.mcp._tool_manager.list_tools()
+        if self.lazy == len(tools):
+            return
+        manifest = {
+            'fingerprint': self.fingerprint,
+            'tools': [
+                {
+                    'name': tool.name,
+                    'title': tool.title,
+                    'description': tool.description,
+                    'inputSchema': tool.parameters,
+                    'outputSchema': tool.output_schema,
+                    'annotations': tool.annotations.model_dump(exclude_none=True) if tool.annotations else None,
+                    '_meta': tool.meta,
+                }
+                for tool in tools
+            ],
+        }
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save the tool manifest to %s: %s", self.path, e)
@@ -0,0 +1,251 @@
+"""Per-handler call metrics for FastMCP servers.
+
+instrument(mcp) wraps the server's @mcp.tool(), @mcp.resource() and
+@mcp.prompt() decorators, so every handler declared afterwards is measured,
+whether FastMCP calls it or other code (the HTTP bridge) calls the function
+directly. For each handler it keeps:
+
+- calls and errors (calls that raised)
+- a latency histogram with p50/p95/p99
+- payload bytes in and out: the length of text and binary data, or null
+  while no payload of the handler could be sized
+
+Call it right after creating the server:
+
+    mcp = FastMCP("Calculator")
+    instrument(mcp)
+
+A histogram is a fixed array of logarithmic buckets, 19% wide, from 1 µs to
+about 2 minutes, so recording a call takes constant time and memory, and the
+percentiles are accurate to within one bucket. Everything is updated from
+the event loop thread, which is where FastMCP calls handlers and awaits
+offloaded ones.
+
+Payload sizes are counted without walking the data, which would cost as
+much as the call being measured. Sized are str and bytes values, images
+and content blocks (their .data or .text), and MCP results shaped as
+{"content": [...]}, whose blocks' "text" or "data" entries are summed;
+for the usual single block that is constant time. Numbers, other
+containers and anything else are unsized and add nothing.
+"""
+import bisect
+import functools
+import inspect
+import os
+import sys
+import time
+
+# Bucket upper bounds in seconds: 2 ** (i / 4) microseconds
+BUCKET_BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(108)]
+PERCENTILES = (0.50, 0.95, 0.99)
+KINDS = ('tools', 'resources', 'prompts')
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+
+
+class Histogram:
+    """Latencies counted in logarithmic buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(fraction * self.count))
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+
+class HandlerMetrics:
+    """Counters and latency histogram of one tool, resource or prompt"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        # None until a payload could be sized
+        self.bytes_in = None
+        self.bytes_out = None
+        self.latency = Histogram()
+
+    def record(self, seconds, bytes_in, bytes_out, error):
+        self.calls += 1
+        if error:
+            self.errors += 1
+        if bytes_in is not None:
+            self.bytes_in = bytes_in + (self.bytes_in or 0)
+        if bytes_out is not None:
+            self.bytes_out = bytes_out + (self.bytes_out or 0)
+        self.latency.add(seconds)
+
+    def info(self):
+        latency = self.latency
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'latency_ms': {
+                'mean': round(latency.total / latency.count * 1000, 3) if latency.count else 0.0,
+                **{f'p{round(p * 100)}': round(latency.percentile(p) * 1000, 3) for p in PERCENTILES},
+                'max': round(latency.max * 1000, 3),
+            },
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+        }
+
+
+class MetricsRegistry:
+    """Metrics of every instrumented handler, by kind and name"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.handlers = {kind: {} for kind in KINDS}
+
+    def handler(self, kind, name):
+        return self.handlers[kind].setdefault(name, HandlerMetrics())
+
+    def snapshot(self):
+        """All metrics as JSON-ready data, with the process's RSS, CPU time and uptime"""
+        return {
+            'process': {
+                'pid': os.getpid(),
+                'rss_bytes': process_rss(),
+                'cpu_seconds': round(time.process_time(), 6),
+                'uptime_seconds': round(time.time() - self.started, 3),
+            },
+            **{
+                kind: {name: metrics.info() for name, metrics in handlers.items()}
+                for kind, handlers in self.handlers.items()
+            },
+        }
+
+
+default_registry = MetricsRegistry()
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
+# Values that are not sized, without looking for a .data or .text payload
+_UNSIZED_TYPES = frozenset({type(None), bool, int, float, complex, list, tuple, set, frozenset})
+
+
+def _block_payload(block):
+    """The text or data of a content block, given as a dict or an object"""
+    if type(block) is dict:
+        payload = block.get('text')
+        if payload is None:
+            payload = block.get('data')
+    else:
+        # Image and content objects carry their payload in .data or .text
+        payload = getattr(block, 'data', None)
+        if payload is None:
+            payload = getattr(block, 'text', None)
+    return payload if isinstance(payload, (str, bytes)) else None
+
+
+def payload_size(value):
+    """Bytes of text or binary data in value, or None if it is not sized (see above)"""
+    cls = type(value)
+    if cls is str or cls is bytes or cls is bytearray:
+        return len(value)
+    if cls is dict:
+        content = value.get('content')
+        if type(content) is not list:
+            return None
+        size = None
+        for block in content:
+            payload = _block_payload(block)
+            if payload is not None:
+                size = len(payload) + (size or 0)
+        return size
+    if cls in _UNSIZED_TYPES:
+        return None
+    payload = _block_payload(value)
+    return len(payload) if payload is not None else None
+
+
+def _arguments_size(args, kwargs):
+    size = None
+    for value in (*args, *kwargs.values()):
+        value_size = payload_size(value)
+        if value_size is not None:
+            size = value_size + (size or 0)
+    return size
+
+
+def measured(fn, metrics):
+    """Wrap fn so each call is recorded in metrics, keeping it sync or async"""
+    clock = time.perf_counter
+    record = metrics.record
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = clock()
+            result, error = None, True
+            try:
+                result = await fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                record(clock() - started, _arguments_size(args, kwargs), payload_size(result), error)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            result, error = None, True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                record(clock() - started, _arguments_size(args, kwargs), payload_size(result), error)
+    return wrapper
+
+
+def instrument(mcp, registry=default_registry):
+    """Measure every tool, resource and prompt declared on mcp from now on"""
+    def wrap(register, kind, default_name):
+        @functools.wraps(register)
+        def register_measured(*args, **kwargs):
+            decorator = register(*args, **kwargs)
+            name = args[0] if args and isinstance(args[0], str) else kwargs.get(default_name)
+
+            def decorate(fn):
+                return decorator(measured(fn, registry.handler(kind, name or fn.__name__)))
+            return decorate
+        return register_measured
+
+    mcp.tool = wrap(mcp.tool, 'tools', 'name')
+    mcp.resource = wrap(mcp.resource, 'resources', 'uri')
+    mcp.prompt = wrap(mcp.prompt, 'prompts', 'name')
+    return registry